@@ -13,4 +13,11 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ISMS_project.settings')
 
+# the live updates of the home and my courses pages (students/live.py) are server-sent event streams that stay open,
+# they are only served by an ASGI server such as `uvicorn ISMS_project.asgi:application`, under WSGI the pages fall back to static values
 application = get_asgi_application()
+
+# pays the cold start costs at worker boot instead of on the first requests when WARMUP_ON_BOOT is set
+from students.warmup import warmUpOnBoot  # noqa: E402
+
+warmUpOnBoot()
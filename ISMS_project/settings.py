@@ -42,10 +42,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'students.middleware.SessionMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'students.middleware.StudentProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -56,13 +58,19 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # templates are compiled once per process, the list fragments are rendered on every scroll and search
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -85,6 +93,146 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# the default cache is shared by every worker, it holds the versions that invalidate the cached profiles, catalog pages, prefix index and
+# prerequisite closure; the database cache needs `manage.py createcachetable`, point CACHE_BACKEND and CACHE_LOCATION at redis or memcached in production
+
+# cache of SESSION_MODE=cached_db and cache, shared by every worker so a logout in one of them ends the session in all of them;
+# SESSION_CACHE=redis or memcached is the one for production, the database cache needs `manage.py createcachetable` like the default one,
+# file and locmem are for development only: the file cache lists its whole directory on every write and locmem is per process
+SESSION_CACHE_LOCATIONS = {
+    'database': 'isms_sessions',
+    'redis': 'redis://127.0.0.1:6379/1',
+    'memcached': '127.0.0.1:11211',
+    'file': BASE_DIR / 'var' / 'sessions',
+    'locmem': 'isms-sessions',
+}
+SESSION_CACHE = config('SESSION_CACHE', default='database')
+SESSION_CACHE_LOCATION = config('SESSION_CACHE_LOCATION', default=SESSION_CACHE_LOCATIONS[SESSION_CACHE])
+# redis and memcached evict by themselves, the other caches cull once they pass MAX_ENTRIES, which under SESSION_MODE=cache logs out
+# random users, so the limit has to stay above the number of active sessions; cached_db only reads a culled session from the database again
+SESSION_CACHE_MAX_ENTRIES = config('SESSION_CACHE_MAX_ENTRIES', default=50000, cast=int)
+SESSION_CACHE_OPTIONS = {
+    'MAX_ENTRIES': SESSION_CACHE_MAX_ENTRIES,
+    'CULL_FREQUENCY': 10,
+}
+
+SESSION_CACHES = {
+    'database': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': SESSION_CACHE_LOCATION,
+        'OPTIONS': SESSION_CACHE_OPTIONS,
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': SESSION_CACHE_LOCATION,
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': SESSION_CACHE_LOCATION,
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': SESSION_CACHE_LOCATION,
+        'OPTIONS': SESSION_CACHE_OPTIONS,
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': SESSION_CACHE_LOCATION,
+        'OPTIONS': SESSION_CACHE_OPTIONS,
+    },
+}
+
+CACHES = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'isms-sessions',
+        'OPTIONS': SESSION_CACHE_OPTIONS,
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'var' / 'sessions',
+        'OPTIONS': SESSION_CACHE_OPTIONS,
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': config('CACHE_LOCATION', default='isms_cache'),
+    },
+    # pages of the course list per search and cursor, the entry limit keeps rare searches from growing it without bound
+    'catalog': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'isms-catalog',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+    'sessions': SESSION_CACHES[SESSION_CACHE],
+}
+
+
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+# SESSION_MODE is db, cached_db (reads from the cache, writes through to the database), cache or signed_cookies,
+# students.sessions wraps the chosen backend to count the session reads and writes of every request
+
+SESSION_BACKENDS = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_BACKEND = SESSION_BACKENDS[config('SESSION_MODE', default='cached_db')]
+SESSION_ENGINE = 'students.sessions'
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_METRICS_HEADERS = DEBUG
+
+# messages live in a cookie of their own so flashing one never writes the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
+# Slow query log
+# queries slower than the threshold are logged with the calling line and aggregated for `manage.py slow_queries`, leave empty to disable
+
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=200, cast=lambda value: int(value) if value else None)
+SLOW_QUERY_FLUSH_SECONDS = 30
+
+
+# Warm up
+# compiles templates, resolves urls, opens database connections and fills caches when a worker boots
+
+WARMUP_ON_BOOT = config('WARMUP_ON_BOOT', default=False, cast=bool)
+
+
+# Audit log
+# changes are spooled to AUDIT_SPOOL_DIR and inserted in batches of AUDIT_FLUSH_SIZE or every AUDIT_FLUSH_SECONDS
+
+AUDIT_FLUSH_SIZE = 100
+AUDIT_FLUSH_SECONDS = 5
+AUDIT_SPOOL_DIR = BASE_DIR / 'var' / 'audit'
+
+
+# Live updates
+# server-sent events of the dashboard and course statuses, only served under ASGI
+
+LIVE_POLL_SECONDS = 2
+LIVE_KEEPALIVE_SECONDS = 15
+LIVE_RETRY_MS = 5000
+
+
+# Change feed
+# ordered log of the changed students, courses and enrollments for the nightly syncs of downstream systems, superseded entries are compacted
+# after CHANGE_LOG_COMPACT_AFTER_HOURS and deletions dropped after CHANGE_LOG_RETENTION_DAYS by `manage.py compact_change_log`
+
+CHANGE_FEED_TOKEN = config('CHANGE_FEED_TOKEN', default='')
+CHANGE_LOG_COMPACT_AFTER_HOURS = 24
+CHANGE_LOG_RETENTION_DAYS = 30
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -124,6 +272,19 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# uploads above this size are streamed to a temporary file in chunks instead of being held in memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+
+# Profile photos
+# originals and thumbnails are named after the hash of the photo, so the web server can serve them with a far future expiry,
+# thumbnails are made by PHOTO_WORKERS background threads per process which bounds the memory a burst of uploads can take
+
+PHOTO_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+PHOTO_MAX_PIXELS = 50_000_000
+PHOTO_WORKERS = 2
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
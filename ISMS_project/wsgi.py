@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ISMS_project.settings')
 
 application = get_wsgi_application()
+
+# pays the cold start costs at worker boot instead of on the first requests when WARMUP_ON_BOOT is set
+from students.warmup import warmUpOnBoot  # noqa: E402
+
+warmUpOnBoot()
@@ -1,8 +1,165 @@
-from django.contrib import admin
-from students.models import students, enrollment, courses
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
 
-admin.site.register(students)
-admin.site.register(enrollment)
-admin.site.register(courses)
+from students.models import students, enrollment, courses, departments, hods, studentsArchive, prerequisite
+from students.enrollments import bulkChangeStatus
 
+# below this many rows an exact COUNT(*) is cheap enough
+EXACT_COUNT_LIMIT = 10000
 
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that reads the row count of an unfiltered changelist from the table statistics of the database instead of running COUNT(*) over the whole table,
+    filtered changelists and databases without statistics still get the exact count
+    """
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if query.where:
+            return super().count
+
+        estimate = estimatedRowCount(self.object_list.model._meta.db_table)
+        if estimate is None or estimate < EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
+
+
+def estimatedRowCount(tableName):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute("SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", [tableName])
+        elif connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [tableName])
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+def courseValuesFilter(fieldPath, courseField, filterTitle):
+    """Builds a list filter whose choices are read from the small courses table, the default filter would run a DISTINCT over the filtered table itself
+
+    Args:
+        fieldPath (str): lookup path of the filtered field on the changelist model
+        courseField (str): field of courses that holds the same values
+        filterTitle (str): title shown above the choices
+
+    Returns:
+        type: SimpleListFilter subclass
+    """
+    class CourseValuesFilter(admin.SimpleListFilter):
+        title = filterTitle
+        parameter_name = fieldPath
+
+        def lookups(self, request, model_admin):
+            values = courses.objects.order_by(courseField).values_list(courseField, flat=True).distinct()
+            return [(value, value) for value in values]
+
+        def queryset(self, request, queryset):
+            if self.value():
+                return queryset.filter(**{fieldPath: self.value()})
+            return queryset
+
+    return CourseValuesFilter
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # skips the second, unfiltered COUNT(*) that the changelist runs to show "x of y selected"
+    show_full_result_count = False
+    list_per_page = 50
+
+
+@admin.register(students)
+class studentsAdmin(LargeTableAdmin):
+    list_display = ('id', 'fullName', 'email', 'branch', 'yos', 'semester')
+    list_select_related = ('student', 'branch')
+    list_filter = ('branch', courseValuesFilter('yos', 'year', 'year'), courseValuesFilter('semester', 'semester', 'semester'))
+    search_fields = ('^student__username', '=contact')
+    raw_id_fields = ('student',)
+    ordering = ('-id',)
+
+    @admin.display(description='Name')
+    def fullName(self, obj):
+        return obj.student.get_full_name()
+
+    @admin.display(description='Email')
+    def email(self, obj):
+        return obj.student.email
+
+
+class prerequisiteInline(admin.TabularInline):
+    model = prerequisite
+    fk_name = 'course'
+    raw_id_fields = ('required',)
+    extra = 0
+
+
+@admin.register(courses)
+class coursesAdmin(LargeTableAdmin):
+    list_display = ('id', 'name', 'department', 'HOD', 'year', 'semester', 'enrolled_students')
+    list_select_related = ('department', 'HOD')
+    list_filter = ('department', 'year', 'semester')
+    search_fields = ('^name',)
+    ordering = ('-id',)
+    inlines = [prerequisiteInline]
+
+    def get_readonly_fields(self, request, obj=None):
+        # the counter follows the ongoing enrollments, it is only typed in for a new course
+        return ('enrolled_students',) if obj else ()
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            # a full save would write back the counter as it was when the form was opened, seats taken since then would be lost
+            obj.save(update_fields = [field.name for field in obj._meta.concrete_fields if not field.primary_key and field.name != 'enrolled_students'])
+        else:
+            obj.save()
+
+
+def changeStatusAction(status):
+    def action(modeladmin, request, queryset):
+        changed = bulkChangeStatus(queryset, status)
+        modeladmin.message_user(request, f"{changed} enrollments marked as {status}", messages.SUCCESS)
+
+    action.__name__ = f'markAs{status.capitalize()}'
+    action.short_description = f"Mark selected enrollments as {status}"
+    return action
+
+
+@admin.register(enrollment)
+class enrollmentAdmin(LargeTableAdmin):
+    list_display = ('id', 'studentEmail', 'course', 'status', 'enrollment_date')
+    list_select_related = ('student__student', 'course')
+    list_filter = ('status', 'course__department', courseValuesFilter('course__year', 'year', 'year'), courseValuesFilter('course__semester', 'semester', 'semester'))
+    search_fields = ('^student__student__username', '^course__name')
+    raw_id_fields = ('student', 'course')
+    ordering = ('-id',)
+    actions = [changeStatusAction('ongoing'), changeStatusAction('pass'), changeStatusAction('fail')]
+
+    @admin.display(description='Student', ordering='student__student__username')
+    def studentEmail(self, obj):
+        return obj.student.student.email
+
+
+@admin.register(departments)
+class departmentsAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name')
+    search_fields = ('name',)
+
+
+@admin.register(hods)
+class hodsAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name')
+    search_fields = ('name',)
+
+
+@admin.register(studentsArchive)
+class studentsArchiveAdmin(LargeTableAdmin):
+    list_display = ('originalId', 'student', 'branch', 'yos', 'archived_at')
+    list_select_related = ('student', 'branch')
+    list_filter = ('branch',)
+    raw_id_fields = ('student',)
+    ordering = ('-archived_at',)
@@ -4,3 +4,20 @@ from django.apps import AppConfig
 class StudentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'students'
+
+    def ready(self):
+        from django.core.signals import request_finished
+        from django.db import close_old_connections
+        from django.db.backends.signals import connection_created
+
+        from students import signals  # noqa: F401
+        from students.audit import maybeFlushAuditLog
+        from students.querylog import installSlowQueryLogger, maybeFlushSlowQueries
+
+        connection_created.connect(installSlowQueryLogger)
+        # django connects close_old_connections first, the flushes are put in front of it so they write on the connection of the request
+        # instead of opening a new one after it was closed
+        request_finished.disconnect(close_old_connections)
+        request_finished.connect(maybeFlushSlowQueries)
+        request_finished.connect(maybeFlushAuditLog)
+        request_finished.connect(close_old_connections)
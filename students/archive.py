@@ -0,0 +1,162 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from students.changefeed import logChanges
+from students.models import students, enrollment, studentsArchive, enrollmentArchive
+
+FINAL_YEAR = 4
+FINAL_SEMESTER = 8
+ARCHIVE_BATCH_SIZE = 500
+
+ARCHIVED_STATUSES = ['pass', 'fail']
+
+
+def graduatedStudents():
+    """Students past their final year, or in the last semester of it, that passed at least one course and have no ongoing course left,
+    a student that never passed anything is more likely a stale record than a graduate and stays where an admin can see it
+
+    Returns:
+        QuerySet: students that can be moved to the archive
+    """
+    # Exists instead of a join, so a student with several passed courses is returned once
+    passed = enrollment.objects.filter(student = OuterRef('pk'), status = 'pass')
+    return students.objects.filter(
+        Q(yos__gt = FINAL_YEAR) | Q(yos = FINAL_YEAR, semester__gte = FINAL_SEMESTER),
+        Exists(passed),
+    ).exclude(enrollment__status = 'ongoing')
+
+
+def archiveBatch(studentIds):
+    """Moves the given students and their pass and fail enrollments to the archive tables in a single transaction,
+    the user accounts are kept but deactivated so the history can be restored later
+
+    Args:
+        studentIds (list): ids of the students to archive
+
+    Returns:
+        int: number of students archived
+    """
+    with transaction.atomic():
+        # rows are locked so a concurrent edit can't slip in between the copy and the delete
+        studentRows = list(graduatedStudents().filter(id__in = studentIds).select_for_update())
+        if not studentRows:
+            return 0
+
+        studentArchives = studentsArchive.objects.bulk_create([
+            studentsArchive(
+                originalId = std.id,
+                student_id = std.student_id,
+                fatherName = std.fatherName,
+                motherName = std.motherName,
+                contact = std.contact,
+                dob = std.dob,
+                branch_id = std.branch_id,
+                yos = std.yos,
+                semester = std.semester,
+                address = std.address,
+                photo = std.photo.name,
+                photo_thumbnails = std.photo_thumbnails,
+            )
+            for std in studentRows
+        ])
+        archiveIds = {
+            originalId: archiveId
+            for originalId, archiveId in studentsArchive.objects.filter(originalId__in = [std.id for std in studentRows]).values_list('originalId', 'id')
+        }
+
+        enrollmentRows = enrollment.objects.filter(student_id__in = archiveIds.keys(), status__in = ARCHIVED_STATUSES).values_list(
+            'id', 'student_id', 'course_id', 'course__name', 'enrollment_date', 'status'
+        )
+        enrollmentArchive.objects.bulk_create([
+            enrollmentArchive(
+                originalId = id,
+                student_id = archiveIds[studentId],
+                course_id = courseId,
+                courseName = courseName,
+                enrollment_date = enrollmentDate,
+                status = status,
+            )
+            for id, studentId, courseId, courseName, enrollmentDate, status in enrollmentRows
+        ], batch_size = ARCHIVE_BATCH_SIZE)
+
+        enrollment.objects.filter(student_id__in = archiveIds.keys()).delete()
+        students.objects.filter(id__in = archiveIds.keys()).delete()
+        User.objects.filter(id__in = [std.student_id for std in studentRows]).update(is_active = False)
+
+    return len(studentArchives)
+
+
+def archiveGraduatedStudents(batchSize=ARCHIVE_BATCH_SIZE, dryRun=False):
+    """Archives every graduated student, one batch per transaction so that locks are held only briefly
+
+    Args:
+        batchSize (int, optional): number of students moved per transaction
+        dryRun (bool, optional): only counts the students that would be archived
+
+    Returns:
+        int: number of students archived
+    """
+    if dryRun:
+        return graduatedStudents().count()
+
+    archived = 0
+    lastId = 0
+    while True:
+        studentIds = list(graduatedStudents().filter(id__gt = lastId).order_by('id').values_list('id', flat=True)[:batchSize])
+        if not studentIds:
+            break
+        archived += archiveBatch(studentIds)
+        lastId = studentIds[-1]
+    return archived
+
+
+def restoreStudent(archiveId):
+    """Moves an archived student and their enrollments back into the working tables and reactivates the user account
+
+    Args:
+        archiveId (int): id of the studentsArchive row
+
+    Returns:
+        students: the restored student
+    """
+    with transaction.atomic():
+        archived = studentsArchive.objects.select_for_update().get(id = archiveId)
+
+        studentInstance = students.objects.create(
+            id = archived.originalId,
+            student_id = archived.student_id,
+            fatherName = archived.fatherName,
+            motherName = archived.motherName,
+            contact = archived.contact,
+            dob = archived.dob,
+            branch_id = archived.branch_id,
+            yos = archived.yos,
+            semester = archived.semester,
+            address = archived.address,
+            photo = archived.photo.name,
+            photo_thumbnails = archived.photo_thumbnails,
+        )
+
+        # enrollments of courses that were removed from the catalog in the meantime have nothing to point to anymore and are dropped
+        enrollmentRows = archived.enrollmentarchive_set.exclude(course = None)
+        restoredEnrollments = enrollment.objects.bulk_create([
+            enrollment(
+                id = row.originalId,
+                student_id = studentInstance.id,
+                course_id = row.course_id,
+                status = row.status,
+            )
+            for row in enrollmentRows
+        ])
+        logChanges(enrollment, [row.id for row in restoredEnrollments])
+        # enrollment_date is overwritten by auto_now_add on insert, so the original dates are written back in one update
+        enrollmentDates = {row.originalId: row.enrollment_date for row in enrollmentRows}
+        for row in restoredEnrollments:
+            row.enrollment_date = enrollmentDates[row.id]
+        enrollment.objects.bulk_update(restoredEnrollments, ['enrollment_date'], batch_size = ARCHIVE_BATCH_SIZE)
+
+        User.objects.filter(id = archived.student_id).update(is_active = True)
+        archived.delete()
+
+    return studentInstance
@@ -0,0 +1,187 @@
+import atexit
+import json
+import logging
+import os
+import time
+import uuid
+from itertools import count
+from pathlib import Path
+from threading import Lock
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger('students.audit')
+
+# events of this process that are spooled to disk but not inserted yet
+_buffer = []
+_bufferLock = Lock()
+_lastFlush = [time.monotonic()]
+_rotations = count()
+
+
+def spoolDir():
+    directory = Path(settings.AUDIT_SPOOL_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def spoolPath():
+    # one spool file per process, so writers never interleave lines of different processes
+    return spoolDir() / f'audit-{os.getpid()}.jsonl'
+
+
+def recordChange(actor, action, studentId=None, courseId=None, changes=None):
+    """Appends a change to the audit trail once the surrounding transaction commits, the event is written to the spool file of the process
+    and buffered in memory, the database insert happens later in a batch
+
+    Args:
+        actor (User): user who made the change
+        action (str): what happened, like enrollment.status or course.delete
+        studentId (int, optional): id of the student the change belongs to
+        courseId (int, optional): id of the course the change belongs to
+        changes (dict, optional): changed fields with their old and new values
+    """
+    event = {
+        'event_id': str(uuid.uuid4()),
+        'actor_id': actor.id if actor and actor.is_authenticated else None,
+        'action': action,
+        'student_id': studentId,
+        'course_id': courseId,
+        'changes': changes or {},
+        'created_at': timezone.now().isoformat(),
+    }
+    # a rolled back change must not show up in the trail. The spool line is written right after the commit, not inside the transaction, so a
+    # worker killed in between loses the event of a change that did commit; writing it in the transaction would put the insert back on every
+    # change, which the write-behind is there to avoid, and the window is one file append long
+    transaction.on_commit(lambda: bufferEvent(event))
+
+
+def asText(value):
+    return None if value is None else str(value)
+
+
+def changedFields(before, after):
+    """Compares two snapshots of the same fields, form input arrives as strings so the values are compared as text
+
+    Args:
+        before (dict): field values before the change
+        after (dict): field values after the change
+
+    Returns:
+        dict: changed fields mapped to their old and new value
+    """
+    changes = {}
+    for field, value in after.items():
+        old, new = asText(before.get(field)), asText(value)
+        if old != new:
+            changes[field] = {'from': old, 'to': new}
+    return changes
+
+
+def bufferEvent(event):
+    with _bufferLock:
+        # the spool line is written before the event is buffered, so an event in memory is always on disk as well
+        with open(spoolPath(), 'a', encoding='utf-8') as spool:
+            spool.write(json.dumps(event) + '\n')
+        _buffer.append(event)
+        full = len(_buffer) >= settings.AUDIT_FLUSH_SIZE
+    if full:
+        flushAuditLog()
+    else:
+        maybeFlushAuditLog()
+
+
+def maybeFlushAuditLog(**kwargs):
+    """Flushes the buffer when it is older than AUDIT_FLUSH_SECONDS, connected to request_finished so quiet workers still flush"""
+    if _buffer and time.monotonic() - _lastFlush[0] >= settings.AUDIT_FLUSH_SECONDS:
+        flushAuditLog()
+
+
+def insertEvents(events):
+    from students.models import auditLog
+
+    # replaying a spool file may repeat events that already made it in, the unique event id drops them
+    auditLog.objects.bulk_create([
+        auditLog(
+            event_id = event['event_id'],
+            actor_id = event['actor_id'],
+            action = event['action'],
+            student_id = event['student_id'],
+            course_id = event['course_id'],
+            changes = event['changes'],
+            created_at = parse_datetime(event['created_at']),
+        )
+        for event in events
+    ], batch_size = settings.AUDIT_FLUSH_SIZE, ignore_conflicts = True)
+
+
+def flushAuditLog():
+    """Inserts the buffered events of this process in one batch, the spool file is rotated first and only removed once the insert succeeded
+
+    Returns:
+        int: number of events flushed
+    """
+    # inside a transaction the insert could still be rolled back after the spool file is gone
+    if connection.in_atomic_block:
+        return 0
+
+    with _bufferLock:
+        if not _buffer:
+            _lastFlush[0] = time.monotonic()
+            return 0
+        events = list(_buffer)
+        _buffer.clear()
+        _lastFlush[0] = time.monotonic()
+        rotated = spoolPath().with_suffix(f'.{next(_rotations)}.flushing')
+        os.replace(spoolPath(), rotated)
+
+    try:
+        insertEvents(events)
+    except Exception:
+        # the rotated file stays on disk and is picked up by `manage.py flush_audit_log`
+        logger.exception("Audit log flush failed, %s events kept in %s", len(events), rotated)
+        return 0
+
+    rotated.unlink(missing_ok=True)
+    return len(events)
+
+
+def processAlive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def replaySpoolFiles():
+    """Inserts the events of spool files left behind by crashed processes or failed flushes, files of running processes are inserted but kept
+
+    Returns:
+        int: number of events replayed
+    """
+    replayed = 0
+    for path in sorted(spoolDir().glob('audit-*')):
+        pid = int(path.name.split('.')[0].split('-')[1])
+        with open(path, encoding='utf-8') as spool:
+            # a crash in the middle of a write leaves a partial last line behind
+            events = []
+            for line in spool:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    logger.warning("Skipping damaged audit line in %s", path)
+
+        insertEvents(events)
+        replayed += len(events)
+        if path.suffix == '.flushing' or not processAlive(pid):
+            path.unlink(missing_ok=True)
+    return replayed
+
+
+atexit.register(flushAuditLog)
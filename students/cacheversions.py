@@ -0,0 +1,66 @@
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def versionKey(name):
+    return f'version:{name}'
+
+
+def cacheVersion(name):
+    """Current version of a group of cache entries, kept in the default cache that every worker shares so a bump in one worker is seen by all of them
+
+    Args:
+        name (str): name of the group, like catalog or student-profile:<user id>
+
+    Returns:
+        int: current version number
+    """
+    # a version evicted from the cache starts again from the clock, never from a number an older entry was stored under
+    return cache.get_or_set(versionKey(name), time.time_ns, timeout=None)
+
+
+def bumpVersion(name):
+    try:
+        cache.incr(versionKey(name))
+    except ValueError:
+        cache.set(versionKey(name), time.time_ns(), timeout=None)
+
+
+def bumpCacheVersion(name):
+    """Moves every entry of the group to a new version once the surrounding transaction commits, a bump before the commit would let a
+    request in between cache the old rows under the new version
+
+    Args:
+        name (str): name of the group
+    """
+    transaction.on_commit(partial(bumpVersion, name))
+
+
+def getVersioned(key, names, load, timeout):
+    """Reads an entry of the default cache that was stored together with the versions of the groups it depends on, the entry and the versions
+    come back in one round trip and the entry is loaded again as soon as any of the versions moved
+
+    Args:
+        key (str): cache key of the entry
+        names (list): names of the version groups the entry depends on
+        load (callable): loads the value when the entry is missing or outdated
+        timeout (int): seconds the entry is kept
+
+    Returns:
+        object: cached or freshly loaded value
+    """
+    versionKeys = [versionKey(name) for name in names]
+    found = cache.get_many([key, *versionKeys])
+    versions = [found.get(versionKeyName) for versionKeyName in versionKeys]
+    entry = found.get(key)
+    if entry is not None and None not in versions and entry[0] == versions:
+        return entry[1]
+
+    # the versions are read before the value, a bump while it loads leaves the entry outdated instead of storing old rows under the new version
+    versions = [version if version is not None else cacheVersion(name) for version, name in zip(versions, names)]
+    value = load()
+    cache.set(key, (versions, value), timeout)
+    return value
@@ -0,0 +1,87 @@
+import re
+from hashlib import md5
+
+from django.core.cache import caches
+from django.db.models import Q
+from django.template.loader import render_to_string
+
+from students.cacheversions import bumpCacheVersion, cacheVersion
+from students.models import courses
+from students.pagination import cursorBatch
+
+COURSES_BATCH_SIZE = 10
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+CATALOG_VERSION = 'catalog'
+
+# searches this long are almost never repeated, they are answered from the database without taking a cache slot
+MAX_CACHED_SEARCH_LENGTH = 40
+
+# the course cards leave a marker where the seat counter goes, it is filled in per request
+SEATS_MARKER = re.compile(r'<!--seats:(\d+)-->')
+
+
+def catalogVersion():
+    """Version of the course catalog, kept in the shared cache and bumped when a course is saved or deleted or a department or HOD is renamed.
+    Taking or freeing a seat doesn't bump it, the seat counters are not part of the cached pages
+
+    Returns:
+        int: current catalog version
+    """
+    return cacheVersion(CATALOG_VERSION)
+
+
+def invalidateCatalog():
+    bumpCacheVersion(CATALOG_VERSION)
+
+
+def loadCatalogPage(search, cursor):
+    courseQs = courses.objects.select_related('department', 'HOD')
+    if search:
+        courseQs = courseQs.filter(Q(name__icontains = search) | Q(HOD__name__icontains = search) | Q(department__name__icontains = search))
+
+    courseRows, nextCursor = cursorBatch(courseQs, cursor, COURSES_BATCH_SIZE)
+    return {
+        'courses': courseRows,
+        'nextCursor': nextCursor,
+        'html': render_to_string('partials/courseCards.html', {'courseQs': courseRows}),
+    }
+
+
+def fillSeats(page, version):
+    # the seat counters move with every enrollment, they are read for the courses of the batch by primary key instead of keying the cache on them
+    seats = dict(courses.objects.filter(id__in = [course.id for course in page['courses']]).values_list('id', 'enrolled_students')) if page['courses'] else {}
+    for course in page['courses']:
+        course.enrolled_students = seats.get(course.id, course.enrolled_students)
+    return {
+        **page,
+        'version': version,
+        'seats': seats,
+        'html': SEATS_MARKER.sub(lambda match: str(seats.get(int(match.group(1)), 0)), page['html']),
+    }
+
+
+def catalogPage(search, cursor):
+    """Returns a batch of the course catalog with its rendered course cards, served from the catalog cache under the current catalog version
+    with the seat counters filled in fresh, the cache has its own entry limit so rarely used searches and outdated versions are evicted instead of growing it
+
+    Args:
+        search (str): search term of the course list, empty for the whole catalog
+        cursor (str): id of the last course of the previous batch, empty for the first batch
+
+    Returns:
+        dict: courses of the batch, cursor of the next batch, the rendered course cards, the catalog version and the seat counters
+    """
+    search = (search or '').strip()
+    try:
+        cursor = int(cursor)
+    except (TypeError, ValueError):
+        cursor = 0
+
+    version = catalogVersion()
+    if len(search) > MAX_CACHED_SEARCH_LENGTH:
+        return fillSeats(loadCatalogPage(search, cursor), version)
+
+    # the search matches case insensitively, so the key does too, hashed to stay a valid memcached key
+    searchKey = md5(search.casefold().encode()).hexdigest()
+    key = f'catalog:v{version}:{searchKey}:{cursor}'
+    return fillSeats(caches['catalog'].get_or_set(key, lambda: loadCatalogPage(search, cursor), CATALOG_CACHE_TIMEOUT), version)
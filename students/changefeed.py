@@ -0,0 +1,237 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signing import BadSignature, Signer
+from django.db import transaction
+from django.db.models import Case, Exists, OuterRef, Value, When
+from django.utils import timezone
+
+from students.models import students, courses, enrollment, changeLog, changeFeedSequence
+
+# columns of every table in the feed, personal details like contact and address stay in this app
+FEED_COLUMNS = {
+    'students': (students, ['id', 'student_id', 'student__first_name', 'student__last_name', 'student__email', 'branch_id', 'yos', 'semester', 'updated_at']),
+    'courses': (courses, ['id', 'name', 'department_id', 'HOD_id', 'year', 'semester', 'capacity', 'enrolled_students', 'updated_at']),
+    'enrollment': (enrollment, ['id', 'student_id', 'course_id', 'status', 'enrollment_date', 'updated_at']),
+}
+# the purge entry remembers up to which sequence number deletions were dropped, it is never part of the feed itself
+PURGE_TABLE = 'changelog'
+
+CHANGE_FEED_BATCH_SIZE = 500
+CHANGE_FEED_MAX_BATCH_SIZE = 5000
+COMPACTION_BATCH_SIZE = 1000
+SNAPSHOT_CURSOR_SALT = 'students.changefeed.snapshot'
+
+
+class ResyncRequired(Exception):
+    """Raised for a cursor behind deletions that were already purged, the caller has to sync again from 0"""
+
+
+def logChanges(model, rowIds, operation='upsert'):
+    """Appends changed rows to the change log with one INSERT, on the connection of the caller so the entries commit or roll back with the change itself.
+    Saves and deletes are logged by the signals, queryset updates and bulk creates have to call this inside their transaction
+
+    Args:
+        model (Model): students, courses or enrollment
+        rowIds (iterable): ids of the changed rows
+        operation (str, optional): upsert or delete
+    """
+    changeLog.objects.bulk_create([
+        changeLog(table_name = model._meta.model_name, row_id = rowId, operation = operation)
+        for rowId in rowIds
+    ])
+
+
+def purgeState():
+    # id of the purge entry, which changes with every purge, and the sequence number up to which deletions were dropped
+    return changeLog.objects.filter(table_name = PURGE_TABLE).order_by('-id').values_list('id', 'row_id').first() or (0, 0)
+
+
+def purgedThrough():
+    return purgeState()[1]
+
+
+def readCursor(cursor):
+    """Turns a cursor of the feed back into a sequence number. A plain number is the cursor of a caller that is caught up and must not be behind
+    purged deletions. A snapshot read from 0 stays below them for a while, its cursors are signed together with the purge they started after,
+    so a caller can't skip the check and a purge in the middle of the snapshot still sends it back to 0
+
+    Args:
+        cursor (int | str): 0, a sequence number or a signed snapshot cursor returned by the feed
+
+    Returns:
+        int: sequence number of the last change the caller applied
+
+    Raises:
+        ValueError: the cursor is malformed or its signature doesn't match
+        ResyncRequired: deletions after the cursor were already purged
+    """
+    cursor = str(cursor)
+    purgeId, purged = purgeState()
+    if ':' in cursor:
+        try:
+            seq, snapshotPurgeId = Signer(salt = SNAPSHOT_CURSOR_SALT).unsign(cursor).split(':')
+        except BadSignature:
+            raise ValueError(f"Invalid snapshot cursor {cursor}")
+        if int(snapshotPurgeId) != purgeId:
+            raise ResyncRequired(cursor)
+        return int(seq)
+
+    seq = int(cursor)
+    # starting over from 0 never needs the purged deletions, the rows they removed are not in the snapshot either
+    if 0 < seq < purged:
+        raise ResyncRequired(cursor)
+    return seq
+
+
+def makeCursor(seq):
+    purgeId, purged = purgeState()
+    if 0 < seq < purged:
+        return Signer(salt = SNAPSHOT_CURSOR_SALT).sign(f'{seq}:{purgeId}')
+    return seq
+
+
+def sequenceEntries(limit=CHANGE_FEED_MAX_BATCH_SIZE):
+    """Hands out the next sequence numbers to the committed entries that have none yet. The auto increment id is taken when a transaction inserts,
+    not when it commits, so a long transaction would commit entries behind a cursor that already moved past them; numbered here in the order
+    they become visible, an entry always lands after everything a caller has read, however long its transaction ran
+
+    Args:
+        limit (int, optional): number of entries numbered at most
+
+    Returns:
+        bool: True if committed entries are left without a number
+    """
+    with transaction.atomic():
+        # the lock comes before the first read of the transaction, so the read sees every entry committed while waiting for it
+        sequence, _ = changeFeedSequence.objects.select_for_update().get_or_create(id = 1)
+        entryIds = list(changeLog.objects.filter(seq = None).exclude(table_name = PURGE_TABLE).order_by('id').values_list('id', flat=True)[:limit + 1])
+        numbered = entryIds[:limit]
+        if numbered:
+            changeLog.objects.filter(id__in = numbered).update(
+                seq = Case(*[When(id = entryId, then = Value(sequence.last + position)) for position, entryId in enumerate(numbered, 1)])
+            )
+            sequence.last += len(numbered)
+            sequence.save(update_fields = ['last'])
+    return len(entryIds) > limit
+
+
+def sequencedThrough():
+    """Numbers every committed entry that has no sequence number yet
+
+    Returns:
+        int: highest sequence number handed out
+    """
+    while sequenceEntries():
+        pass
+    return changeFeedSequence.objects.filter(id = 1).values_list('last', flat=True).first() or 0
+
+
+def changesSince(cursor, limit=CHANGE_FEED_BATCH_SIZE):
+    """Reads the next batch of the change feed after the cursor, every changed row appears once with its current columns, even if it changed several times
+
+    Args:
+        cursor (int | str): cursor returned by the last batch, 0 to start from a full snapshot
+        limit (int, optional): number of change log entries read at most
+
+    Returns:
+        dict: changes, the cursor to pass next time and whether more changes are waiting
+
+    Raises:
+        ValueError: the cursor is malformed
+        ResyncRequired: deletions after the cursor were already purged, the caller has to sync again from 0
+    """
+    cursor = readCursor(cursor)
+    limit = max(1, min(limit, CHANGE_FEED_MAX_BATCH_SIZE))
+    unnumbered = sequenceEntries(limit)
+    entries = list(changeLog.objects.filter(seq__gt = cursor).order_by('seq').values_list('seq', 'table_name', 'row_id', 'operation')[:limit + 1])
+    batch = entries[:limit]
+
+    # the last entry of every row wins, the columns are read once per table
+    latest = {}
+    for seq, tableName, rowId, operation in batch:
+        latest.pop((tableName, rowId), None)
+        latest[(tableName, rowId)] = (seq, operation)
+
+    rows = {}
+    for tableName, (model, columns) in FEED_COLUMNS.items():
+        rowIds = [rowId for (table, rowId), (_, operation) in latest.items() if table == tableName and operation == 'upsert']
+        if rowIds:
+            rows[tableName] = {row['id']: row for row in model.objects.filter(id__in = rowIds).values(*columns)}
+
+    changes = []
+    for (tableName, rowId), (seq, operation) in latest.items():
+        row = rows.get(tableName, {}).get(rowId)
+        # a row deleted after this entry is sent as deleted right away, its own delete entry follows in a later batch
+        changes.append({'seq': seq, 'table': tableName, 'id': rowId, 'op': 'upsert' if row else 'delete', 'row': row})
+
+    return {
+        'changes': changes,
+        'next': makeCursor(batch[-1][0] if batch else cursor),
+        'more': len(entries) > limit or unnumbered,
+    }
+
+
+def compactChangeLog(batchSize=COMPACTION_BATCH_SIZE):
+    """Drops the entries older than CHANGE_LOG_COMPACT_AFTER_HOURS that a newer entry of the same row supersedes, walking the log in id order one batch at a time.
+    A caller behind them still gets the row from the newer entry, so compaction never makes anyone sync again
+
+    Args:
+        batchSize (int, optional): number of entries looked at per statement
+
+    Returns:
+        int: number of entries removed
+    """
+    threshold = timezone.now() - timedelta(hours = settings.CHANGE_LOG_COMPACT_AFTER_HOURS)
+    newer = changeLog.objects.filter(table_name = OuterRef('table_name'), row_id = OuterRef('row_id'), id__gt = OuterRef('id'))
+
+    removed = 0
+    lastId = 0
+    while True:
+        window = list(changeLog.objects.filter(id__gt = lastId, created_at__lt = threshold).order_by('id').values_list('id', flat=True)[:batchSize])
+        if not window:
+            break
+        lastId = window[-1]
+        supersededIds = list(changeLog.objects.filter(id__in = window).exclude(table_name = PURGE_TABLE).filter(Exists(newer)).values_list('id', flat=True))
+        if supersededIds:
+            removed += changeLog.objects.filter(id__in = supersededIds).delete()[0]
+    return removed
+
+
+def purgeChangeLog(batchSize=COMPACTION_BATCH_SIZE):
+    """Drops the delete entries older than CHANGE_LOG_RETENTION_DAYS once they are the only entry left of their row, the newest upsert of every row
+    is kept for good so the log stays a snapshot. The highest purged sequence number is recorded in a new purge entry, plain cursors behind it and
+    snapshot cursors signed before it are sent back to 0
+
+    Args:
+        batchSize (int, optional): number of entries removed per statement
+
+    Returns:
+        int: number of entries removed
+    """
+    threshold = timezone.now() - timedelta(days = settings.CHANGE_LOG_RETENTION_DAYS)
+    # a snapshot read from 0 must not meet an upsert of a row whose deletion is gone
+    older = changeLog.objects.filter(table_name = OuterRef('table_name'), row_id = OuterRef('row_id'), id__lt = OuterRef('id'))
+
+    removed = 0
+    lastPurged = 0
+    lastId = 0
+    while True:
+        window = list(
+            changeLog.objects.filter(id__gt = lastId, operation = 'delete', created_at__lt = threshold).exclude(seq = None)
+            .order_by('id').values_list('id', flat=True)[:batchSize]
+        )
+        if not window:
+            break
+        lastId = window[-1]
+        deleteIds = list(changeLog.objects.filter(id__in = window).exclude(Exists(older)).values_list('id', flat=True))
+        if deleteIds:
+            lastPurged = max(lastPurged, *changeLog.objects.filter(id__in = deleteIds).values_list('seq', flat=True))
+            removed += changeLog.objects.filter(id__in = deleteIds).delete()[0]
+
+    if lastPurged:
+        with transaction.atomic():
+            lastPurged = max(lastPurged, purgedThrough())
+            changeLog.objects.filter(table_name = PURGE_TABLE).delete()
+            changeLog.objects.create(table_name = PURGE_TABLE, row_id = lastPurged, operation = 'purge')
+    return removed
@@ -0,0 +1,88 @@
+from hashlib import md5
+
+from django.db.models import Count, Max
+
+from students.catalog import catalogPage
+from students.models import enrollment
+
+
+def requestMemo(request, name, compute):
+    # the ETag and Last-Modified functions of a view share the same state, so it is computed once per request
+    attribute = f'_conditional_{name}'
+    if not hasattr(request, attribute):
+        setattr(request, attribute, compute())
+    return getattr(request, attribute)
+
+
+def makeEtag(*parts):
+    return md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def profileEtag(request):
+    """The profile page shows the student row, the name of their branch and the name and email of the user, all of them come from the already
+    cached request.student and request.user so no query is needed. A renamed department moves no timestamp of the student, so the page has no
+    Last-Modified and is revalidated on the ETag alone
+
+    Args:
+        request (HttpRequest): incoming HTTP request from the client
+
+    Returns:
+        str | None: ETag of the profile page, None for admins and users without a profile
+    """
+    user, student = request.user, request.student
+    if user.is_superuser or not student:
+        return None
+    return makeEtag(user.id, student.updated_at.isoformat(), student.branch.name, user.first_name, user.last_name, user.email)
+
+
+def myCoursesState(request):
+    """Latest change of the enrollments of the student or of the courses they are enrolled in, the count catches removed enrollments
+
+    Args:
+        request (HttpRequest): incoming HTTP request from the client
+
+    Returns:
+        dict | None: last change times and number of enrollments, None for users without a profile
+    """
+    def compute():
+        if not request.student:
+            return None
+        return enrollment.objects.filter(student_id = request.student.id).aggregate(
+            lastEnrollment = Max('updated_at'),
+            lastCourse = Max('course__updated_at'),
+            count = Count('id'),
+        )
+    return requestMemo(request, 'myCourses', compute)
+
+
+def myCoursesLastModified(request):
+    state = myCoursesState(request)
+    if not state or not state['count']:
+        return None
+    return max(state['lastEnrollment'], state['lastCourse'])
+
+
+def myCoursesEtag(request):
+    state = myCoursesState(request)
+    if state is None:
+        return None
+    return makeEtag(request.user.id, state['lastEnrollment'], state['lastCourse'], state['count'], request.GET.get('filter', 'All'))
+
+
+def requestCatalogPage(request):
+    """Catalog batch of the request, loaded once and shared by the ETag and the view
+
+    Args:
+        request (HttpRequest): incoming HTTP request from the client
+
+    Returns:
+        dict: the batch as returned by catalogPage
+    """
+    return requestMemo(request, 'catalog', lambda: catalogPage(request.GET.get('search'), request.GET.get('cursor')))
+
+
+def catalogEtag(request):
+    page = requestCatalogPage(request)
+    # the same catalog version renders differently for every search and cursor, and the page around it for every user; there is no
+    # Last-Modified, a time can't tell the users apart and a browser switching accounts would get the page of the previous one
+    return makeEtag(request.user.id, page['version'], sorted(page['seats'].items()), request.GET.urlencode())
@@ -0,0 +1,28 @@
+from django.core.cache import cache
+
+from students.models import students, courses
+
+ADMIN_DASHBOARD_CACHE_KEY = 'admin-dashboard-stats'
+ADMIN_DASHBOARD_TIMEOUT = 60 * 10
+
+
+def computeAdminDashboardStats():
+    return {
+        'courseCount': courses.objects.count(),
+        'hodCount': courses.objects.values('HOD_id').distinct().count(),
+        'studentCount': students.objects.count(),
+        'deptCount': courses.objects.values('department_id').distinct().count(),
+    }
+
+
+def adminDashboardStats():
+    """Returns the counters shown on the admin home page, computed once and then served from the cache until a course or student is saved or deleted
+
+    Returns:
+        dict: number of courses, HODs, students and departments
+    """
+    return cache.get_or_set(ADMIN_DASHBOARD_CACHE_KEY, computeAdminDashboardStats, ADMIN_DASHBOARD_TIMEOUT)
+
+
+def invalidateAdminDashboard():
+    cache.delete(ADMIN_DASHBOARD_CACHE_KEY)
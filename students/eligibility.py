@@ -0,0 +1,95 @@
+from students.cacheversions import bumpCacheVersion, getVersioned
+from students.models import courses, enrollment, prerequisite, waitlist
+
+PREREQUISITES_VERSION = 'prerequisites'
+CLOSURE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def invalidatePrerequisites():
+    """Bumps the shared prerequisite version so every worker resolves the closure again, called whenever a prerequisite is added, edited or removed"""
+    bumpCacheVersion(PREREQUISITES_VERSION)
+
+
+def resolveClosure(edges):
+    """Resolves the direct prerequisites into every course a course transitively requires, a course that is part of a cycle requires itself and is never eligible
+
+    Args:
+        edges (iterable): pairs of course id and required course id
+
+    Returns:
+        dict: course id mapped to the frozenset of all the course ids it requires, courses without prerequisites are left out
+    """
+    direct = {}
+    for courseId, requiredId in edges:
+        direct.setdefault(courseId, set()).add(requiredId)
+
+    closure = {}
+    for courseId, requiredIds in direct.items():
+        seen = set()
+        pending = list(requiredIds)
+        while pending:
+            requiredId = pending.pop()
+            if requiredId not in seen:
+                seen.add(requiredId)
+                pending.extend(direct.get(requiredId, ()))
+        closure[courseId] = frozenset(seen)
+    return closure
+
+
+def prerequisiteClosure():
+    return getVersioned('prerequisite-closure', [PREREQUISITES_VERSION], lambda: resolveClosure(prerequisite.objects.values_list('course_id', 'required_id')), CLOSURE_CACHE_TIMEOUT)
+
+
+def eligibleCourses(studentQs):
+    """Computes the courses every student of the cohort can be enrolled in: the courses offered to their branch, year and semester that they have not taken
+    or been waitlisted for yet and whose whole prerequisite closure they passed. The cohort is handled with four queries no matter its size, five when the closure has to be resolved again,
+    the rest are set operations in memory
+
+    Args:
+        studentQs (QuerySet): students of the cohort, a single student is a queryset filtered by id
+
+    Returns:
+        dict: student id mapped to the set of eligible course ids
+    """
+    cohort = list(studentQs.values_list('id', 'branch_id', 'yos', 'semester'))
+    if not cohort:
+        return {}
+    terms = {(branch, year, semester) for _, branch, year, semester in cohort}
+
+    offered = {}
+    courseQs = courses.objects.filter(
+        department_id__in = {branch for branch, _, _ in terms},
+        year__in = {year for _, year, _ in terms},
+        semester__in = {semester for _, _, semester in terms},
+    )
+    for courseId, department, year, semester in courseQs.values_list('id', 'department_id', 'year', 'semester'):
+        if (department, year, semester) in terms:
+            offered.setdefault((department, year, semester), []).append(courseId)
+
+    closure = prerequisiteClosure()
+    empty = frozenset()
+    offeredIds = {courseId for courseIds in offered.values() for courseId in courseIds}
+    requiredIds = set().union(*(closure.get(courseId, empty) for courseId in offeredIds))
+
+    # only the enrollments in the offered courses and their prerequisites matter, the cohort itself goes in as a subquery
+    taken, passed = {}, {}
+    enrollmentQs = enrollment.objects.filter(student__in = studentQs.values('id'), course_id__in = offeredIds | requiredIds)
+    for studentId, courseId, status in enrollmentQs.values_list('student_id', 'course_id', 'status'):
+        if courseId in offeredIds:
+            taken.setdefault(studentId, set()).add(courseId)
+        if status == 'pass':
+            passed.setdefault(studentId, set()).add(courseId)
+    # a waitlisted student already holds a place in the queue of the course
+    waitlistQs = waitlist.objects.filter(student__in = studentQs.values('id'), course_id__in = offeredIds)
+    for studentId, courseId in waitlistQs.values_list('student_id', 'course_id'):
+        taken.setdefault(studentId, set()).add(courseId)
+
+    eligible = {}
+    for studentId, branch, year, semester in cohort:
+        studentTaken = taken.get(studentId, empty)
+        studentPassed = passed.get(studentId, empty)
+        eligible[studentId] = {
+            courseId for courseId in offered.get((branch, year, semester), ())
+            if courseId not in studentTaken and closure.get(courseId, empty) <= studentPassed
+        }
+    return eligible
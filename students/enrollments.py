@@ -0,0 +1,169 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Value, When
+from django.utils import timezone
+
+from students.changefeed import logChanges
+from students.live import notifyLiveHub
+from students.models import students, courses, enrollment, waitlist
+
+# number of waitlisted students moved into a course per transaction
+PROMOTION_BATCH_SIZE = 100
+
+
+def hasFreeSeat():
+    return Q(capacity = None) | Q(enrolled_students__lt = F('capacity'))
+
+
+def takeSeat(courseId, studentId):
+    """Takes a seat of the course with a single conditional UPDATE, the row is only locked for the statement itself
+    so thousands of parallel enrollments neither lose updates nor queue behind a long lock. A free seat is only taken
+    when no other student is waiting for the course, the waitlist gets the seats first
+
+    Args:
+        courseId (int): id of the course
+        studentId (int): id of the student taking the seat
+
+    Returns:
+        bool: True if a seat was free and is now taken
+    """
+    othersWaiting = waitlist.objects.filter(course_id = OuterRef('id')).exclude(student_id = studentId)
+    taken = courses.objects.filter(hasFreeSeat(), id = courseId).exclude(Exists(othersWaiting)).update(enrolled_students = F('enrolled_students') + 1, updated_at = timezone.now()) == 1
+    if taken:
+        logChanges(courses, [courseId])
+    return taken
+
+
+def enrollOrWaitlist(studentId, courseId):
+    """Enrolls the student into the course if a seat is free and nobody is waiting for it, otherwise puts the student at the end of the waitlist of the course.
+    A student already taking the course is left as they are
+
+    Args:
+        studentId (int): id of the student
+        courseId (int): id of the course
+
+    Returns:
+        str: ongoing if enrolled, waitlisted otherwise
+    """
+    with transaction.atomic():
+        # the requests of one student run one after the other, so a double submit can't enroll them twice, other students don't wait for the lock
+        list(students.objects.select_for_update().filter(id = studentId).values_list('id', flat=True))
+        if enrollment.objects.filter(student_id = studentId, course_id = courseId, status = 'ongoing').exists():
+            return 'ongoing'
+
+        if takeSeat(courseId, studentId):
+            enrollment.objects.create(student_id = studentId, course_id = courseId, status = 'ongoing')
+            # the student may have been the only one waiting, the seat ends the wait in the same transaction
+            waitlist.objects.filter(student_id = studentId, course_id = courseId).delete()
+            transaction.on_commit(notifyLiveHub)
+            return 'ongoing'
+
+        waitlist.objects.get_or_create(student_id = studentId, course_id = courseId)
+        # seats the queue hasn't picked up yet, after a capacity raise for example, go to its head instead of this student
+        transaction.on_commit(partial(promoteWaitlistIfFree, courseId))
+        return 'waitlisted'
+
+
+def promoteWaitlistIfFree(courseId):
+    # a full course, the usual case of a waitlisted student, is answered without locking the course row
+    if courses.objects.filter(hasFreeSeat(), id = courseId).exists():
+        promoteWaitlist(courseId)
+
+
+def adjustSeats(deltas):
+    """Applies the change of the ongoing enrollments of several courses with a single UPDATE, courses that freed seats promote their waitlist once the transaction commits
+
+    Args:
+        deltas (dict): change of the enrolled students counter for each course id
+    """
+    deltas = {courseId: delta for courseId, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    courses.objects.filter(id__in = deltas.keys()).update(
+        enrolled_students = F('enrolled_students') + Case(*[When(id = courseId, then = Value(delta)) for courseId, delta in deltas.items()]),
+        updated_at = timezone.now(),
+    )
+    logChanges(courses, deltas.keys())
+
+    for courseId, delta in deltas.items():
+        if delta < 0:
+            transaction.on_commit(partial(promoteWaitlist, courseId))
+
+
+def promoteWaitlist(courseId):
+    """Moves waitlisted students into the free seats of the course in the order they joined, one batch per transaction
+
+    Args:
+        courseId (int): id of the course
+
+    Returns:
+        int: number of students promoted
+    """
+    promoted = 0
+    while True:
+        with transaction.atomic():
+            # locking the course row keeps takeSeat from handing out the same seats while the batch is moved
+            course = courses.objects.select_for_update().filter(id = courseId).first()
+            if course is None:
+                break
+
+            freeSeats = PROMOTION_BATCH_SIZE
+            if course.capacity is not None:
+                freeSeats = min(course.capacity - course.enrolled_students, PROMOTION_BATCH_SIZE)
+            if freeSeats <= 0:
+                break
+
+            waiting = list(waitlist.objects.filter(course_id = courseId).order_by('id').values_list('id', 'student_id')[:freeSeats])
+            if not waiting:
+                break
+
+            enrollment.objects.bulk_create([
+                enrollment(student_id = studentId, course_id = courseId, status = 'ongoing')
+                for _, studentId in waiting
+            ])
+            waitlist.objects.filter(id__in = [waitlistId for waitlistId, _ in waiting]).delete()
+            courses.objects.filter(id = courseId).update(enrolled_students = F('enrolled_students') + len(waiting), updated_at = timezone.now())
+            # bulk_create doesn't return the ids on every database, the new rows are found by their student
+            logChanges(enrollment, enrollment.objects.filter(course_id = courseId, student_id__in = [studentId for _, studentId in waiting]).values_list('id', flat=True))
+            logChanges(courses, [courseId])
+
+        promoted += len(waiting)
+
+    if promoted:
+        notifyLiveHub()
+    return promoted
+
+
+def bulkChangeStatus(enrollmentQs, status):
+    """Changes the status of every enrollment in the queryset with a single UPDATE and keeps the enrolled students counter of the courses in step,
+    a course only counts its ongoing enrollments and seats freed by pass or fail go to the waitlist
+
+    Args:
+        enrollmentQs (QuerySet): enrollments to change
+        status (str): one of ongoing, pass or fail
+
+    Returns:
+        int: number of enrollments whose status actually changed
+    """
+    with transaction.atomic():
+        changedQs = enrollmentQs.exclude(status = status).order_by()
+        # the rows are locked so the ids written to the change log are exactly the rows the UPDATE changes
+        changedIds = list(changedQs.select_for_update().values_list('id', flat=True))
+
+        # admins may put a student back to ongoing even when the course is full, the waitlist only fills seats that are actually free
+        # enrollments going back to ongoing take a seat, enrollments leaving ongoing free one, pass to fail changes nothing
+        if status == 'ongoing':
+            counterQs, direction = changedQs, 1
+        else:
+            counterQs, direction = changedQs.filter(status = 'ongoing'), -1
+        deltas = {row['course_id']: row['total'] * direction for row in counterQs.values('course_id').annotate(total = Count('id'))}
+
+        # auto_now is not applied by update(), updated_at is set explicitly so conditional GETs see the change
+        changed = changedQs.update(status = status, updated_at = timezone.now())
+        logChanges(enrollment, changedIds)
+        adjustSeats(deltas)
+        transaction.on_commit(notifyLiveHub)
+
+    return changed
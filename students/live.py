@@ -0,0 +1,185 @@
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, Max
+
+from students.dashboard import computeAdminDashboardStats
+from students.models import students, courses, enrollment
+
+logger = logging.getLogger('students.live')
+
+DASHBOARD_TOPIC = 'dashboard'
+STUDENT_TOPIC_PREFIX = 'student:'
+
+
+def studentTopic(studentId):
+    return f'{STUDENT_TOPIC_PREFIX}{studentId}'
+
+
+def dashboardSignature():
+    # max and count come straight off the indexes, the distinct counts of the dashboard only run when this moves
+    return (
+        tuple(courses.objects.aggregate(last = Max('updated_at'), count = Count('id')).values()),
+        tuple(students.objects.aggregate(last = Max('id'), count = Count('id')).values()),
+    )
+
+
+def studentCourseStates(studentIds):
+    states = {studentId: {'activeCount': 0, 'passCount': 0, 'failCount': 0, 'courses': {}} for studentId in studentIds}
+    counters = {'ongoing': 'activeCount', 'pass': 'passCount', 'fail': 'failCount'}
+    for studentId, courseId, status in enrollment.objects.filter(student_id__in = studentIds).values_list('student_id', 'course_id', 'status'):
+        states[studentId]['courses'][courseId] = status
+        if status in counters:
+            states[studentId][counters[status]] += 1
+    return states
+
+
+def readChanges(topics, signatures):
+    """Reads what changed for the subscribed topics of this worker, a few queries per round no matter how many clients are connected
+
+    Args:
+        topics (list): subscribed topics, the dashboard and one topic per student
+        signatures (dict): signature of every topic at the last round
+
+    Returns:
+        tuple: new state of the changed topics and their new signatures
+    """
+    close_old_connections()
+    states, newSignatures = {}, {}
+
+    if DASHBOARD_TOPIC in topics:
+        signature = dashboardSignature()
+        if signature != signatures.get(DASHBOARD_TOPIC):
+            newSignatures[DASHBOARD_TOPIC] = signature
+            states[DASHBOARD_TOPIC] = computeAdminDashboardStats()
+
+    studentIds = [int(topic[len(STUDENT_TOPIC_PREFIX):]) for topic in topics if topic.startswith(STUDENT_TOPIC_PREFIX)]
+    if studentIds:
+        # the (student, updated_at) index answers this without touching the rows, the count catches removed enrollments
+        found = {
+            row['student_id']: (row['last'], row['count'])
+            for row in enrollment.objects.filter(student_id__in = studentIds).values('student_id').annotate(last = Max('updated_at'), count = Count('id')).order_by()
+        }
+        changedIds = [studentId for studentId in studentIds if found.get(studentId, (None, 0)) != signatures.get(studentTopic(studentId))]
+        if changedIds:
+            for studentId, state in studentCourseStates(changedIds).items():
+                newSignatures[studentTopic(studentId)] = found.get(studentId, (None, 0))
+                states[studentTopic(studentId)] = state
+
+    return states, newSignatures
+
+
+class LiveHub:
+    """Fans the changes of the dashboard counters and of the course statuses of students out to the server-sent event streams of this worker,
+    a single loop reads the changes for all topics every LIVE_POLL_SECONDS, or right away when this process saved something, and every
+    stream of a topic gets the same already serialized state, so connected clients never query the database themselves
+    """
+
+    def __init__(self):
+        self.subscribers = {}
+        self.states = {}
+        self.signatures = {}
+        self.loop = None
+        self.wakeUp = None
+        self.task = None
+
+    def subscribe(self, topic):
+        # a slow client only ever needs the newest state, so its queue holds one
+        queue = asyncio.Queue(maxsize = 1)
+        self.subscribers.setdefault(topic, set()).add(queue)
+        self.start()
+
+        if topic in self.states:
+            queue.put_nowait(self.states[topic])
+        else:
+            self.wakeUp.set()
+        return queue
+
+    def unsubscribe(self, topic, queue):
+        queues = self.subscribers.get(topic, set())
+        queues.discard(queue)
+        if not queues:
+            self.subscribers.pop(topic, None)
+            self.states.pop(topic, None)
+            self.signatures.pop(topic, None)
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.loop is not loop:
+            self.loop = loop
+            self.wakeUp = asyncio.Event()
+            self.task = loop.create_task(self.run())
+
+    def notify(self):
+        """Wakes the loop up so a change saved by this process reaches the clients without waiting for the next round, safe to call from any thread"""
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.wakeUp.set)
+
+    def publish(self, topic, state):
+        self.states[topic] = state
+        for queue in self.subscribers.get(topic, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(state)
+
+    async def refresh(self):
+        states, signatures = await sync_to_async(readChanges)(list(self.subscribers), dict(self.signatures))
+        for topic, state in states.items():
+            # the last client of the topic may have left while the queries ran
+            if topic not in self.subscribers:
+                continue
+            self.signatures[topic] = signatures[topic]
+            # a course edit moves the signature without changing the counters, the clients already have that state
+            data = json.dumps(state)
+            if data != self.states.get(topic):
+                self.publish(topic, data)
+
+    async def run(self):
+        while self.subscribers:
+            self.wakeUp.clear()
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Live update refresh failed")
+            try:
+                await asyncio.wait_for(self.wakeUp.wait(), settings.LIVE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+liveHub = LiveHub()
+
+
+def notifyLiveHub():
+    liveHub.notify()
+
+
+async def eventStream(topic, hub=liveHub):
+    """Server-sent event stream of a topic, one event with the full state every time it changes
+
+    Args:
+        topic (str): dashboard or the topic of a student
+        hub (LiveHub, optional): hub to subscribe to
+
+    Yields:
+        str: server-sent event frames
+    """
+    event = topic.split(':')[0]
+    queue = hub.subscribe(topic)
+    try:
+        yield f"retry: {settings.LIVE_RETRY_MS}\n\n"
+        while True:
+            try:
+                data = await asyncio.wait_for(queue.get(), settings.LIVE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # proxies drop connections that stay silent for too long
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event}\ndata: {data}\n\n"
+    finally:
+        hub.unsubscribe(topic, queue)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from students.archive import archiveGraduatedStudents, ARCHIVE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Moves graduated students and their pass and fail enrollments to the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help="number of students moved per transaction")
+        parser.add_argument('--dry-run', action='store_true', help="only count the students that would be archived")
+
+    def handle(self, *args, **options):
+        archived = archiveGraduatedStudents(batchSize=options['batch_size'], dryRun=options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(f"{archived} students would be archived")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Archived {archived} students"))
@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from students.changefeed import changesSince, ResyncRequired, CHANGE_FEED_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ("Prints the changes of students, courses and enrollments after a cursor as one JSON batch per line, "
+            "until the feed is caught up, the last line carries the cursor to pass next time")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', default='0', help="cursor printed by the last run, 0 for a full snapshot")
+        parser.add_argument('--limit', type=int, default=CHANGE_FEED_BATCH_SIZE, help="number of change log entries per batch")
+
+    def handle(self, *args, **options):
+        cursor = options['since']
+        changed = 0
+        while True:
+            try:
+                page = changesSince(cursor, options['limit'])
+            except ResyncRequired:
+                raise CommandError(f"Deletions after {cursor} were already purged, sync again with --since 0")
+            except ValueError:
+                raise CommandError(f"{cursor} is not a cursor printed by this command")
+            if page['changes']:
+                self.stdout.write(json.dumps(page, cls=DjangoJSONEncoder))
+            changed += len(page['changes'])
+            cursor = page['next']
+            if not page['more']:
+                break
+
+        self.stderr.write(f"{changed} changed rows, next --since {cursor}")
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from students.sessions import clearExpiredSessions, storesInDatabase, CLEANUP_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Deletes expired sessions from the database in batches, run it from cron instead of the one statement `manage.py clearsessions`"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=CLEANUP_BATCH_SIZE, help="number of sessions deleted per statement")
+
+    def handle(self, *args, **options):
+        if not storesInDatabase():
+            self.stdout.write(f"Sessions are kept in {settings.SESSION_BACKEND}, they expire on their own")
+            return
+
+        deleted = clearExpiredSessions(batchSize=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired sessions"))
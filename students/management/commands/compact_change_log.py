@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from students.changefeed import compactChangeLog, purgeChangeLog, COMPACTION_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ("Removes change log entries superseded by a newer entry of the same row and drops deletions older than CHANGE_LOG_RETENTION_DAYS, "
+            "run it nightly after the downstream syncs")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=COMPACTION_BATCH_SIZE, help="number of entries handled per statement")
+
+    def handle(self, *args, **options):
+        compacted = compactChangeLog(batchSize=options['batch_size'])
+        purged = purgeChangeLog(batchSize=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Compacted {compacted} superseded entries, purged {purged} deletions older than {settings.CHANGE_LOG_RETENTION_DAYS} days"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from students.photos import deleteUnusedPhotos, UNUSED_PHOTO_GRACE_HOURS
+
+
+class Command(BaseCommand):
+    help = "Removes student photos and their thumbnails that nobody shows anymore, replaced or left behind by deleted students, run it nightly"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=UNUSED_PHOTO_GRACE_HOURS, help="photos stored more recently than this are kept")
+
+    def handle(self, *args, **options):
+        removed = deleteUnusedPhotos(graceHours=options['grace_hours'])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} unused photos"))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from students.eligibility import eligibleCourses
+from students.enrollments import enrollOrWaitlist
+from students.models import students, departments
+
+
+class Command(BaseCommand):
+    help = "Computes the eligible courses of a cohort of students from their passed courses and the prerequisites, optionally enrolling them for registration or rollover"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', help="department name of the cohort, all departments when left out")
+        parser.add_argument('--year', type=int, help="year of study of the cohort")
+        parser.add_argument('--semester', type=int, help="semester of the cohort")
+        parser.add_argument('--enroll', action='store_true', help="enroll every student into their eligible courses, or waitlist them when a course is full")
+
+    def handle(self, *args, **options):
+        studentQs = students.objects.all()
+        if options['branch']:
+            department = departments.objects.filter(name = options['branch']).first()
+            if department is None:
+                raise CommandError(f"Unknown department {options['branch']}")
+            studentQs = studentQs.filter(branch = department)
+        if options['year'] is not None:
+            studentQs = studentQs.filter(yos = options['year'])
+        if options['semester'] is not None:
+            studentQs = studentQs.filter(semester = options['semester'])
+
+        start = time.perf_counter()
+        eligible = eligibleCourses(studentQs)
+        duration = time.perf_counter() - start
+        pairs = sum(len(courseIds) for courseIds in eligible.values())
+        self.stdout.write(f"{len(eligible)} students, {pairs} eligible enrollments, computed in {duration:.2f} s")
+
+        if options['enroll']:
+            waitlisted = 0
+            for studentId, courseIds in eligible.items():
+                for courseId in sorted(courseIds):
+                    waitlisted += enrollOrWaitlist(studentId, courseId) == 'waitlisted'
+            self.stdout.write(self.style.SUCCESS(f"Enrolled {pairs - waitlisted}, waitlisted {waitlisted}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from students.audit import replaySpoolFiles
+
+
+class Command(BaseCommand):
+    help = "Inserts audit events left in the spool files by crashed workers or failed flushes, safe to run while workers are up"
+
+    def handle(self, *args, **options):
+        replayed = replaySpoolFiles()
+        self.stdout.write(self.style.SUCCESS(f"Replayed {replayed} audit events"))
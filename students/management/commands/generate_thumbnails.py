@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from students.models import students, studentsArchive
+from students.photos import generateThumbnails, markThumbnailsReady
+
+
+class Command(BaseCommand):
+    help = "Makes the missing thumbnails of student photos, for jobs lost to a restart or a failure of the background thumbnail workers"
+
+    def handle(self, *args, **options):
+        pending = Q(photo_thumbnails = False) & ~Q(photo = '')
+        photoNames = set(students.objects.filter(pending).values_list('photo', flat = True))
+        photoNames |= set(studentsArchive.objects.filter(pending).values_list('photo', flat = True))
+
+        for photoName in sorted(photoNames):
+            try:
+                generateThumbnails(photoName)
+            except Exception as e:
+                self.stderr.write(f"{photoName}: {e}")
+                continue
+            markThumbnailsReady(photoName)
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(photoNames)} photos"))
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import os
+import resource
+import time
+import tracemalloc
+from statistics import median
+
+from django.core.management.base import BaseCommand
+
+from students.live import LiveHub, eventStream, DASHBOARD_TOPIC
+
+
+class Command(BaseCommand):
+    help = ("Opens idle server-sent event streams against an in-process live hub and reports the memory each one holds, how long one change takes "
+            "to reach all of them and the event loop lag while they sit idle, then estimates how many idle connections a single ASGI worker can hold")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=5000, help="number of idle streams to open")
+        parser.add_argument('--rounds', type=int, default=5, help="number of changes fanned out to all streams")
+
+    def handle(self, *args, **options):
+        asyncio.run(self.benchmark(options['connections'], options['rounds']))
+
+    async def benchmark(self, connections, rounds):
+        hub = LiveHub()
+        delivered = [0]
+        allDelivered = asyncio.Event()
+
+        async def client():
+            # stands in for the ASGI server, which pulls the frames of the stream the same way
+            async for frame in eventStream(DASHBOARD_TOPIC, hub):
+                if frame.startswith('event:'):
+                    delivered[0] += 1
+                    if delivered[0] == connections:
+                        allDelivered.set()
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        clients = [asyncio.create_task(client()) for _ in range(connections)]
+        # every stream gets the current dashboard first, read once from the database for all of them
+        await allDelivered.wait()
+        connectSeconds = time.perf_counter() - start
+        perConnection = (tracemalloc.get_traced_memory()[0] - before) / connections
+        tracemalloc.stop()
+
+        fanOut = []
+        for round in range(rounds):
+            delivered[0] = 0
+            allDelivered.clear()
+            start = time.perf_counter()
+            hub.publish(DASHBOARD_TOPIC, json.dumps({'round': round}))
+            await allDelivered.wait()
+            fanOut.append(time.perf_counter() - start)
+
+        lags = []
+        for _ in range(20):
+            start = time.perf_counter()
+            await asyncio.sleep(0.05)
+            lags.append(time.perf_counter() - start - 0.05)
+
+        for task in clients + [hub.task]:
+            task.cancel()
+        await asyncio.gather(*clients, hub.task, return_exceptions=True)
+
+        fileLimit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+        availableMemory = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        capacity = min(fileLimit, int(availableMemory / perConnection))
+
+        self.stdout.write(f"connections        {connections}")
+        self.stdout.write(f"first state        {connectSeconds * 1000:8.1f} ms to reach all streams")
+        self.stdout.write(f"memory             {perConnection / 1024:8.1f} KiB per idle stream")
+        self.stdout.write(f"fan out            {median(fanOut) * 1000:8.1f} ms median, {max(fanOut) * 1000:.1f} ms max for one change to reach all streams")
+        self.stdout.write(f"idle loop lag      {median(lags) * 1000:8.2f} ms median, {max(lags) * 1000:.2f} ms max")
+        self.stdout.write(f"file descriptors   {fileLimit} (soft limit, one per connection)")
+        # the ASGI server keeps its own socket and parser buffers per connection on top of the stream itself
+        self.stdout.write(self.style.SUCCESS(
+            f"a worker can hold about {capacity} idle connections, bound by the {'file descriptor limit' if capacity == fileLimit else 'free memory'}, "
+            "less the per connection buffers of the ASGI server"
+        ))
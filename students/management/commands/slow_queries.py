@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from students.models import slowQueries
+from students.querylog import flushSlowQueries
+
+ORDERINGS = {
+    'total': '-total_ms',
+    'max': '-max_ms',
+    'calls': '-calls',
+}
+
+
+class Command(BaseCommand):
+    help = "Lists the slowest query fingerprints recorded by the slow query log together with the calling line and the captured plan"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10, help="number of fingerprints to list")
+        parser.add_argument('--order', choices=ORDERINGS.keys(), default='total', help="sort by total time, slowest single call or number of calls")
+        parser.add_argument('--explain', action='store_true', help="print the captured plan of every listed query")
+        parser.add_argument('--reset', action='store_true', help="delete the recorded statistics after printing them")
+
+    def handle(self, *args, **options):
+        flushSlowQueries()
+        offenders = slowQueries.objects.order_by(ORDERINGS[options['order']])[:options['limit']]
+
+        if not offenders:
+            self.stdout.write("No slow queries recorded")
+        
+        for rank, query in enumerate(offenders, start=1):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"#{rank}  total {query.total_ms:.0f} ms  calls {query.calls}  avg {query.total_ms / query.calls:.1f} ms  max {query.max_ms:.1f} ms"
+            ))
+            self.stdout.write(f"    from {query.caller}")
+            self.stdout.write(f"    {query.sql}")
+            if options['explain'] and query.explain:
+                for line in query.explain.splitlines():
+                    self.stdout.write(f"      {line}")
+
+        if options['reset']:
+            slowQueries.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS("Slow query statistics cleared"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from students.warmup import warmUp
+
+
+class Command(BaseCommand):
+    help = ("Precompiles the templates, resolves the URLs, opens the database connections and fills the caches, printing how long each phase took. "
+            "It runs in a process of its own, to warm a worker call students.warmup.warmUp() from the post fork hook of the server")
+
+    def handle(self, *args, **options):
+        total = 0
+        for phase, duration, summary in warmUp():
+            total += duration
+            self.stdout.write(f"{phase:<10} {duration * 1000:8.1f} ms  {summary}")
+        self.stdout.write(self.style.SUCCESS(f"{'total':<10} {total * 1000:8.1f} ms"))
@@ -0,0 +1,58 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from students.profiles import getStudentProfile
+
+logger = logging.getLogger('students.sessions')
+
+
+def getRequestStudent(request):
+    if not hasattr(request, '_cached_student'):
+        request._cached_student = getStudentProfile(request.user)
+    return request._cached_student
+
+
+class StudentProfileMiddleware:
+    """Attaches the lazily loaded student profile of the logged in user to the request as request.student,
+    the profile is resolved at most once per request and only when a view actually uses it.
+    Must be placed after AuthenticationMiddleware.
+    """
+    # a sync only middleware would push every request under ASGI through a thread, including the long lived event streams
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.student = SimpleLazyObject(lambda: getRequestStudent(request))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.student = SimpleLazyObject(lambda: getRequestStudent(request))
+        return await self.get_response(request)
+
+
+class SessionMetricsMiddleware(MiddlewareMixin):
+    """Reports how often the request read and wrote its session, from the counts of students.sessions.SessionStore.
+    Must be placed before SessionMiddleware so the session is already saved when the response gets here.
+    """
+
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        if not hasattr(session, 'reads'):
+            return response
+
+        logger.debug("%s %s session reads=%s writes=%s", request.method, request.path, session.reads, session.writes)
+        if settings.SESSION_METRICS_HEADERS:
+            response['X-Session-Reads'] = session.reads
+            response['X-Session-Writes'] = session.writes
+        return response
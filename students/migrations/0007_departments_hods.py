@@ -0,0 +1,59 @@
+# Generated by Django 5.2.4 on 2025-07-21 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_alter_enrollment_status'),
+    ]
+
+    operations = [
+        # the old text columns are made nullable so that this change can be reversed after they are dropped
+        migrations.AlterField(
+            model_name='courses',
+            name='department',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='courses',
+            name='HOD',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='students',
+            name='branch',
+            field=models.CharField(max_length=50, null=True),
+        ),
+        migrations.CreateModel(
+            name='departments',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='hods',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='courses',
+            name='department_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='students.departments'),
+        ),
+        migrations.AddField(
+            model_name='courses',
+            name='HOD_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='students.hods'),
+        ),
+        migrations.AddField(
+            model_name='students',
+            name='branch_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='students.departments'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+
+def normalize(name):
+    # collapses repeated whitespace so that 'Computer  Science ' and 'computer science' end up in the same department
+    return ' '.join((name or '').split())
+
+
+def getOrCreate(model, name, lookup):
+    key = normalize(name).casefold()
+    if key not in lookup:
+        lookup[key] = model.objects.get_or_create(name = normalize(name))[0]
+    return lookup[key]
+
+
+def backfill(apps, schema_editor):
+    departments = apps.get_model('students', 'departments')
+    hods = apps.get_model('students', 'hods')
+    courses = apps.get_model('students', 'courses')
+    students = apps.get_model('students', 'students')
+    
+    deptLookup = {}
+    hodLookup = {}
+    
+    for name in courses.objects.values_list('department', flat=True).distinct():
+        courses.objects.filter(department = name).update(department_ref = getOrCreate(departments, name, deptLookup))
+    
+    for name in courses.objects.values_list('HOD', flat=True).distinct():
+        courses.objects.filter(HOD = name).update(HOD_ref = getOrCreate(hods, name, hodLookup))
+    
+    for name in students.objects.values_list('branch', flat=True).distinct():
+        students.objects.filter(branch = name).update(branch_ref = getOrCreate(departments, name, deptLookup))
+
+
+def restore(apps, schema_editor):
+    courses = apps.get_model('students', 'courses')
+    students = apps.get_model('students', 'students')
+    
+    for course in courses.objects.select_related('department_ref', 'HOD_ref'):
+        course.department = course.department_ref.name
+        course.HOD = course.HOD_ref.name
+        course.save(update_fields=['department', 'HOD'])
+    
+    for student in students.objects.select_related('branch_ref'):
+        student.branch = student.branch_ref.name
+        student.save(update_fields=['branch'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0007_departments_hods'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, restore),
+    ]
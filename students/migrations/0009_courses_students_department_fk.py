@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4 on 2025-07-21 10:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0008_backfill_departments_hods'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='courses',
+            name='department',
+        ),
+        migrations.RemoveField(
+            model_name='courses',
+            name='HOD',
+        ),
+        migrations.RemoveField(
+            model_name='students',
+            name='branch',
+        ),
+        migrations.RenameField(
+            model_name='courses',
+            old_name='department_ref',
+            new_name='department',
+        ),
+        migrations.RenameField(
+            model_name='courses',
+            old_name='HOD_ref',
+            new_name='HOD',
+        ),
+        migrations.RenameField(
+            model_name='students',
+            old_name='branch_ref',
+            new_name='branch',
+        ),
+        migrations.AlterField(
+            model_name='courses',
+            name='department',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='students.departments'),
+        ),
+        migrations.AlterField(
+            model_name='courses',
+            name='HOD',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='students.hods'),
+        ),
+        migrations.AlterField(
+            model_name='students',
+            name='branch',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='students.departments'),
+        ),
+        migrations.AddIndex(
+            model_name='courses',
+            index=models.Index(fields=['department', 'year', 'semester'], name='course_dept_year_sem_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2025-07-23 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0009_courses_students_department_fk'),
+    ]
+
+    operations = [
+        # the old text column is made nullable so that this change can be reversed after it is dropped
+        migrations.AlterField(
+            model_name='students',
+            name='dob',
+            field=models.CharField(max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='students',
+            name='dob_date',
+            field=models.DateField(null=True),
+        ),
+    ]
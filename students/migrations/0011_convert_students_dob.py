@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from django.db import migrations
+
+# the date input of the complete profile page sends YYYY-MM-DD, the rest were typed in by hand through the admin edit page
+DOB_FORMATS = ['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d', '%d.%m.%Y']
+
+
+def parseDob(value):
+    value = (value or '').strip()
+    for dobFormat in DOB_FORMATS:
+        try:
+            return datetime.strptime(value, dobFormat).date()
+        except ValueError:
+            pass
+    # unparseable values are left empty instead of guessing a date
+    return None
+
+
+def convert(apps, schema_editor):
+    students = apps.get_model('students', 'students')
+    
+    for dob in students.objects.values_list('dob', flat=True).distinct():
+        students.objects.filter(dob = dob).update(dob_date = parseDob(dob))
+
+
+def restore(apps, schema_editor):
+    students = apps.get_model('students', 'students')
+    
+    for dobDate in students.objects.exclude(dob_date = None).values_list('dob_date', flat=True).distinct():
+        students.objects.filter(dob_date = dobDate).update(dob = dobDate.strftime('%Y-%m-%d'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0010_students_dob_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(convert, restore),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2025-07-23 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0011_convert_students_dob'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='students',
+            name='dob',
+        ),
+        migrations.RenameField(
+            model_name='students',
+            old_name='dob_date',
+            new_name='dob',
+        ),
+        migrations.AddIndex(
+            model_name='students',
+            index=models.Index(fields=['branch', 'yos', 'semester'], name='student_branch_year_sem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='students',
+            index=models.Index(fields=['dob'], name='student_dob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='students',
+            index=models.Index(fields=['contact'], name='student_contact_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-19 19:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0012_students_dob_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='studentsArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('originalId', models.BigIntegerField(unique=True)),
+                ('fatherName', models.CharField(max_length=20, null=True)),
+                ('motherName', models.CharField(max_length=20, null=True)),
+                ('contact', models.BigIntegerField()),
+                ('dob', models.DateField(null=True)),
+                ('yos', models.IntegerField()),
+                ('semester', models.IntegerField()),
+                ('address', models.CharField(max_length=200)),
+                ('archived_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='students.departments')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='enrollmentArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('originalId', models.BigIntegerField(unique=True)),
+                ('courseName', models.CharField(max_length=100)),
+                ('enrollment_date', models.DateField()),
+                ('status', models.CharField(choices=[('ongoing', 'ongoing'), ('pass', 'pass'), ('fail', 'fail')], max_length=7)),
+                ('course', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='students.courses')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='students.studentsarchive')),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-19 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0014_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['status'], name='enrollment_status_idx'),
+        ),
+    ]
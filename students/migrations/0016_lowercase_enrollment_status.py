@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def lowercaseStatus(apps, schema_editor):
+    # auto-enrollment used to store 'Ongoing' while the choices, the filters and the counters all use lowercase values,
+    # MySQL compares with a case insensitive collation so rows can't be told apart by case and every match is rewritten
+    enrollment = apps.get_model('students', 'enrollment')
+    for status in ['ongoing', 'pass', 'fail']:
+        enrollment.objects.filter(status__iexact = status).update(status = status)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0015_enrollment_status_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercaseStatus, migrations.RunPython.noop),
+    ]
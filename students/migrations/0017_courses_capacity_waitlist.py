@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-19 19:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0016_lowercase_enrollment_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courses',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='waitlist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='students.courses')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='students.students')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'id'], name='waitlist_course_order_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'course'), name='waitlist_student_course_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-19 19:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0018_slowqueries'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='auditLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.UUIDField(unique=True)),
+                ('action', models.CharField(max_length=30)),
+                ('student_id', models.BigIntegerField(null=True)),
+                ('course_id', models.BigIntegerField(null=True)),
+                ('changes', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField()),
+                ('actor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student_id', 'created_at'], name='audit_student_created_idx'), models.Index(fields=['course_id', 'created_at'], name='audit_course_created_idx')],
+            },
+        ),
+    ]
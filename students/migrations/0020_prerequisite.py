@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-19 19:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0019_auditlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='prerequisite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prerequisites', to='students.courses')),
+                ('required', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='students.courses')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('course', 'required'), name='prerequisite_course_required_unique'), models.CheckConstraint(condition=models.Q(('course', models.F('required')), _negated=True), name='prerequisite_not_self')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-19 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0020_prerequisite'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='students',
+            name='photo',
+            field=models.ImageField(blank=True, upload_to='photos/original/'),
+        ),
+        migrations.AddField(
+            model_name='students',
+            name='photo_thumbnails',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='studentsarchive',
+            name='photo',
+            field=models.ImageField(blank=True, upload_to='photos/original/'),
+        ),
+        migrations.AddField(
+            model_name='studentsarchive',
+            name='photo_thumbnails',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.3 on 2026-10-19 19:55
+
+from django.db import migrations, models
+
+SEED_BATCH_SIZE = 1000
+
+
+def seed(apps, schema_editor):
+    # one upsert for every existing row, so a feed read from sequence 0 is a full snapshot
+    changeLog = apps.get_model('students', 'changeLog')
+    for tableName in ['students', 'courses', 'enrollment']:
+        model = apps.get_model('students', tableName)
+        lastId = 0
+        while True:
+            rowIds = list(model.objects.filter(id__gt = lastId).order_by('id').values_list('id', flat=True)[:SEED_BATCH_SIZE])
+            if not rowIds:
+                break
+            changeLog.objects.bulk_create([changeLog(table_name = tableName, row_id = rowId, operation = 'upsert') for rowId in rowIds])
+            lastId = rowIds[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0021_student_photo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='changeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_name', models.CharField(max_length=20)),
+                ('row_id', models.BigIntegerField()),
+                ('operation', models.CharField(choices=[('upsert', 'upsert'), ('delete', 'delete'), ('purge', 'purge')], max_length=6)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['table_name', 'row_id', 'id'], name='changelog_row_idx'), models.Index(fields=['operation', 'created_at'], name='changelog_operation_idx')],
+            },
+        ),
+        migrations.RunPython(seed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0022_changelog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='students',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-19 20:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0023_students_updated_at_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='students',
+            index=models.Index(fields=['student', 'updated_at'], name='student_user_updated_idx'),
+        ),
+    ]
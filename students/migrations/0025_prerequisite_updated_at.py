@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 20:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0024_students_user_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prerequisite',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-19 20:20
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def sequenceExisting(apps, schema_editor):
+    # the ids were the cursors so far, keeping them as the sequence numbers leaves the saved cursors of downstream systems valid
+    changeLog = apps.get_model('students', 'changeLog')
+    changeFeedSequence = apps.get_model('students', 'changeFeedSequence')
+    changeLog.objects.exclude(table_name = 'changelog').update(seq = F('id'))
+    changeFeedSequence.objects.create(id = 1, last = changeLog.objects.aggregate(last = Max('seq'))['last'] or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0025_prerequisite_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='changeFeedSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='changelog',
+            name='seq',
+            field=models.BigIntegerField(null=True, unique=True),
+        ),
+        migrations.RunPython(sequenceExisting, migrations.RunPython.noop),
+    ]
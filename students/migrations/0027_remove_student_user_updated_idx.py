@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-19 20:21
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0026_changelog_seq'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='students',
+            name='student_user_updated_idx',
+        ),
+    ]
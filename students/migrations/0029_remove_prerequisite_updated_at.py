@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-19 20:26
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0028_students_updated_at_drop_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='prerequisite',
+            name='updated_at',
+        ),
+    ]
@@ -1,13 +1,38 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+class departments(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    
+    def __str__(self):
+        return self.name
+    
+
+class hods(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    
+    def __str__(self):
+        return self.name
+    
+
 class courses(models.Model):
     name = models.CharField(max_length=100, null=False)
-    department = models.CharField(max_length=100)
-    HOD = models.CharField(max_length=100)
+    department = models.ForeignKey(departments, on_delete=models.PROTECT)
+    HOD = models.ForeignKey(hods, on_delete=models.PROTECT)
     year  = models.IntegerField(default = 1)
     semester = models.IntegerField(default = 1)
     enrolled_students = models.IntegerField()
+    # number of seats, no limit when empty
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['department', 'year', 'semester'], name='course_dept_year_sem_idx'),
+        ]
+    
+    def __str__(self):
+        return self.name
     
 
 class students(models.Model):
@@ -15,12 +40,23 @@ class students(models.Model):
     fatherName = models.CharField(max_length=20, null=True)
     motherName = models.CharField(max_length=20, null=True)
     contact = models.BigIntegerField(blank=False, null=False)
-    dob = models.CharField(null=False, max_length=10)
-    branch = models.CharField(max_length=50, null=False)
+    dob = models.DateField(null=True)
+    branch = models.ForeignKey(departments, on_delete=models.PROTECT)
     yos = models.IntegerField(null=False)
     semester = models.IntegerField(default=1)
     address = models.CharField(null=False, max_length=200)
     course = models.ManyToManyField(courses, through='enrollment')
+    # stored under the hash of its content, the thumbnails use the same hash once the background job made them
+    photo = models.ImageField(upload_to='photos/original/', blank=True)
+    photo_thumbnails = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'yos', 'semester'], name='student_branch_year_sem_idx'),
+            models.Index(fields=['dob'], name='student_dob_idx'),
+            models.Index(fields=['contact'], name='student_contact_idx'),
+        ]
     
 class enrollment(models.Model):
     enrolledStatus = [
@@ -31,4 +67,119 @@ class enrollment(models.Model):
     student = models.ForeignKey(students, on_delete=models.CASCADE)
     course = models.ForeignKey(courses, on_delete=models.CASCADE)
     enrollment_date = models.DateField(auto_now_add=True)
-    status = models.CharField(max_length=7,choices = enrolledStatus)
\ No newline at end of file
+    status = models.CharField(max_length=7,choices = enrolledStatus)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'updated_at'], name='enrollment_student_updated_idx'),
+            models.Index(fields=['status'], name='enrollment_status_idx'),
+        ]
+
+
+class waitlist(models.Model):
+    student = models.ForeignKey(students, on_delete=models.CASCADE)
+    course = models.ForeignKey(courses, on_delete=models.CASCADE)
+    joined_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'course'], name='waitlist_student_course_unique'),
+        ]
+        indexes = [
+            # seats are handed out in the order students joined, which is the order of the ids
+            models.Index(fields=['course', 'id'], name='waitlist_course_order_idx'),
+        ]
+
+
+class prerequisite(models.Model):
+    # the course can only be taken once the student passed the required course
+    course = models.ForeignKey(courses, on_delete=models.CASCADE, related_name='prerequisites')
+    required = models.ForeignKey(courses, on_delete=models.CASCADE, related_name='+')
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'required'], name='prerequisite_course_required_unique'),
+            models.CheckConstraint(condition=~models.Q(course=models.F('required')), name='prerequisite_not_self'),
+        ]
+
+
+class studentsArchive(models.Model):
+    originalId = models.BigIntegerField(unique=True)
+    student = models.ForeignKey(User, on_delete=models.CASCADE)
+    fatherName = models.CharField(max_length=20, null=True)
+    motherName = models.CharField(max_length=20, null=True)
+    contact = models.BigIntegerField()
+    dob = models.DateField(null=True)
+    branch = models.ForeignKey(departments, on_delete=models.PROTECT)
+    yos = models.IntegerField()
+    semester = models.IntegerField()
+    address = models.CharField(max_length=200)
+    photo = models.ImageField(upload_to='photos/original/', blank=True)
+    photo_thumbnails = models.BooleanField(default=False)
+    archived_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+
+class enrollmentArchive(models.Model):
+    originalId = models.BigIntegerField(unique=True)
+    student = models.ForeignKey(studentsArchive, on_delete=models.CASCADE)
+    # the course may be removed from the catalog long after the student graduated, the name keeps the history readable
+    course = models.ForeignKey(courses, on_delete=models.SET_NULL, null=True)
+    courseName = models.CharField(max_length=100)
+    enrollment_date = models.DateField()
+    status = models.CharField(max_length=7, choices=enrollment.enrolledStatus)
+
+
+class slowQueries(models.Model):
+    fingerprint = models.CharField(max_length=32, unique=True)
+    sql = models.TextField()
+    caller = models.CharField(max_length=255)
+    calls = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    # plan captured the first time the fingerprint was seen
+    explain = models.TextField(blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField()
+
+
+class auditLog(models.Model):
+    # ids are kept as plain numbers so the trail outlives deleted students and courses
+    event_id = models.UUIDField(unique=True)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    action = models.CharField(max_length=30)
+    student_id = models.BigIntegerField(null=True)
+    course_id = models.BigIntegerField(null=True)
+    changes = models.JSONField(default=dict)
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['student_id', 'created_at'], name='audit_student_created_idx'),
+            models.Index(fields=['course_id', 'created_at'], name='audit_course_created_idx'),
+        ]
+
+
+class changeLog(models.Model):
+    changeOperations = [
+        ('upsert', 'upsert'),
+        ('delete', 'delete'),
+        ('purge', 'purge'),
+    ]
+    table_name = models.CharField(max_length=20)
+    row_id = models.BigIntegerField()
+    operation = models.CharField(max_length=6, choices=changeOperations)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # the sequence number downstream systems sync from, handed out in commit order once the entry is visible, empty until then
+    seq = models.BigIntegerField(null=True, unique=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['table_name', 'row_id', 'id'], name='changelog_row_idx'),
+            models.Index(fields=['operation', 'created_at'], name='changelog_operation_idx'),
+        ]
+
+
+class changeFeedSequence(models.Model):
+    # a single row, locked while committed change log entries get their sequence numbers
+    last = models.BigIntegerField(default=0)
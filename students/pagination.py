@@ -0,0 +1,23 @@
+def cursorBatch(queryset, cursor, batchSize):
+    """Fetches the next batch of rows after the cursor, the cursor is the id of the last row already shown so the query is an index range scan no matter how far the user has scrolled
+
+    Args:
+        queryset (QuerySet): rows to page through
+        cursor (str): id of the last row of the previous batch, empty for the first batch
+        batchSize (int): number of rows per batch
+
+    Returns:
+        tuple: list of rows of this batch and the cursor of the next batch, None when there are no more rows
+    """
+    try:
+        cursor = int(cursor)
+    except (TypeError, ValueError):
+        cursor = 0
+    
+    rows = list(queryset.filter(id__gt = cursor).order_by('id')[:batchSize + 1])
+    if len(rows) <= batchSize:
+        return rows, None
+    
+    rows = rows[:batchSize]
+    lastRow = rows[-1]
+    return rows, lastRow[0] if isinstance(lastRow, tuple) else lastRow.id
@@ -0,0 +1,207 @@
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.templatetags.static import static
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from students.models import students, studentsArchive
+from students.profiles import invalidateStudentProfile
+
+logger = logging.getLogger('students.photos')
+
+# edge length of the square thumbnails, twice the size they are shown at for high density screens
+PHOTO_VARIANTS = {'profile': 400, 'card': 240, 'list': 96}
+PHOTO_FORMATS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+PLACEHOLDER = 'images/user_profile.png'
+ORIGINALS_DIR = 'photos/original'
+# photos stored more recently than this are never swept, their rows may not be committed yet
+UNUSED_PHOTO_GRACE_HOURS = 24
+
+# only JPEG can be decoded at a fraction of its size, the other formats are decoded whole so they get a tighter limit
+MAX_FULL_DECODE_PIXELS = 16_000_000
+
+_executor = []
+
+
+def thumbnailExecutor():
+    # created on first use so management commands and tests that never upload don't start threads
+    if not _executor:
+        _executor.append(ThreadPoolExecutor(max_workers=settings.PHOTO_WORKERS, thread_name_prefix='thumbnails'))
+    return _executor[0]
+
+
+def photoHash(photoName):
+    return PurePosixPath(photoName).stem
+
+
+def thumbnailName(photoHashValue, variant):
+    return f'photos/{variant}/{photoHashValue}.jpg'
+
+
+def photoUrl(photoName, thumbnailsReady, variant):
+    """URL of a thumbnail of the photo, the placeholder until the background job made the thumbnails
+
+    Args:
+        photoName (str): storage name of the original photo, empty when the student has none
+        thumbnailsReady (bool): whether the thumbnails of the photo exist
+        variant (str): one of profile, card or list
+
+    Returns:
+        str: URL of the thumbnail or of the placeholder
+    """
+    if not photoName or not thumbnailsReady:
+        return static(PLACEHOLDER)
+    return default_storage.url(thumbnailName(photoHash(photoName), variant))
+
+
+def validatePhoto(uploadedFile):
+    """Checks the size, format and dimensions of an upload from its header, without decoding the image
+
+    Args:
+        uploadedFile (UploadedFile): uploaded photo
+
+    Returns:
+        str: file extension matching the format of the photo
+    """
+    if uploadedFile.size > settings.PHOTO_MAX_UPLOAD_SIZE:
+        raise ValidationError(f"The photo must be smaller than {settings.PHOTO_MAX_UPLOAD_SIZE // (1024 * 1024)} MB")
+
+    try:
+        with Image.open(uploadedFile) as image:
+            imageFormat, pixels = image.format, image.width * image.height
+            image.verify()
+    except (OSError, SyntaxError, Image.DecompressionBombError):
+        imageFormat, pixels = None, 0
+    finally:
+        uploadedFile.seek(0)
+
+    if imageFormat not in PHOTO_FORMATS:
+        raise ValidationError("Please upload a JPEG, PNG or WebP photo")
+    maxPixels = settings.PHOTO_MAX_PIXELS if imageFormat == 'JPEG' else MAX_FULL_DECODE_PIXELS
+    if pixels > maxPixels:
+        raise ValidationError(f"The photo must have less than {maxPixels // 1_000_000} megapixels")
+    return PHOTO_FORMATS[imageFormat]
+
+
+def contentHash(uploadedFile):
+    digest = hashlib.sha256()
+    for chunk in uploadedFile.chunks():
+        digest.update(chunk)
+    uploadedFile.seek(0)
+    return digest.hexdigest()[:20]
+
+
+def thumbnailsExist(photoHashValue):
+    return all(default_storage.exists(thumbnailName(photoHashValue, variant)) for variant in PHOTO_VARIANTS)
+
+
+def storePhoto(studentInstance, uploadedFile):
+    """Stores the uploaded photo of the student under the hash of its content and queues the thumbnails once the change commits,
+    the upload is read in chunks from the temporary file Django streamed it to, so its size never ends up in memory
+
+    Args:
+        studentInstance (students): student the photo belongs to
+        uploadedFile (UploadedFile): uploaded photo
+    """
+    extension = validatePhoto(uploadedFile)
+    photoHashValue = contentHash(uploadedFile)
+    photoName = f'{ORIGINALS_DIR}/{photoHashValue}{extension}'
+    if not default_storage.exists(photoName):
+        default_storage.save(photoName, uploadedFile)
+
+    # the replaced photo may be shown by other students, it is left to the nightly sweep of deleteUnusedPhotos
+    studentInstance.photo.name = photoName
+    # the same photo uploaded again, by anyone, already has its thumbnails
+    studentInstance.photo_thumbnails = thumbnailsExist(photoHashValue)
+    studentInstance.save(update_fields=['photo', 'photo_thumbnails', 'updated_at'])
+
+    if not studentInstance.photo_thumbnails:
+        transaction.on_commit(lambda: thumbnailExecutor().submit(thumbnailJob, photoName))
+
+
+def generateThumbnails(photoName):
+    """Makes the square thumbnails of a stored photo, largest first with every smaller one scaled down from the previous
+
+    Args:
+        photoName (str): storage name of the original photo
+    """
+    photoHashValue = photoHash(photoName)
+    largest = max(PHOTO_VARIANTS.values())
+
+    with default_storage.open(photoName) as original, Image.open(original) as image:
+        # a JPEG is decoded straight at the smallest scale that still covers the largest thumbnail, a 12 megapixel photo is never expanded in full
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+
+        for variant, size in sorted(PHOTO_VARIANTS.items(), key=lambda item: -item[1]):
+            image = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            name = thumbnailName(photoHashValue, variant)
+            if default_storage.exists(name):
+                continue
+            buffer = BytesIO()
+            image.save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def markThumbnailsReady(photoName):
+    # queryset updates skip the signals, the profiles are invalidated here and updated_at is set for the conditional GETs,
+    # the change feed doesn't carry the photo so nothing is logged
+    userIds = list(students.objects.filter(photo = photoName).values_list('student_id', flat = True))
+    students.objects.filter(photo = photoName).update(photo_thumbnails = True, updated_at = timezone.now())
+    for userId in userIds:
+        invalidateStudentProfile(userId)
+    studentsArchive.objects.filter(photo = photoName).update(photo_thumbnails = True)
+
+
+def thumbnailJob(photoName):
+    close_old_connections()
+    try:
+        generateThumbnails(photoName)
+        markThumbnailsReady(photoName)
+    except Exception:
+        # `manage.py generate_thumbnails` picks the photo up again
+        logger.exception("Generating the thumbnails of %s failed", photoName)
+    finally:
+        close_old_connections()
+
+
+def deleteUnusedPhotos(graceHours=UNUSED_PHOTO_GRACE_HOURS):
+    """Removes the originals and thumbnails that no student or archived student shows anymore, run nightly by `manage.py delete_unused_photos`.
+    Deleting inline when a photo is replaced could race an upload of the same content whose row isn't committed yet, the grace period keeps
+    fresh uploads out of the sweep and every photo is checked again right before it is deleted
+
+    Args:
+        graceHours (int, optional): photos stored more recently than this are kept
+
+    Returns:
+        int: number of photos removed
+    """
+    threshold = timezone.now() - timedelta(hours = graceHours)
+    referenced = set(students.objects.exclude(photo = '').values_list('photo', flat = True).distinct())
+    referenced |= set(studentsArchive.objects.exclude(photo = '').values_list('photo', flat = True).distinct())
+
+    removed = 0
+    if not default_storage.exists(ORIGINALS_DIR):
+        return removed
+    _, fileNames = default_storage.listdir(ORIGINALS_DIR)
+    for fileName in fileNames:
+        photoName = f'{ORIGINALS_DIR}/{fileName}'
+        if photoName in referenced or default_storage.get_modified_time(photoName) >= threshold:
+            continue
+        if students.objects.filter(photo = photoName).exists() or studentsArchive.objects.filter(photo = photoName).exists():
+            continue
+        default_storage.delete(photoName)
+        for variant in PHOTO_VARIANTS:
+            default_storage.delete(thumbnailName(photoHash(photoName), variant))
+        removed += 1
+    return removed
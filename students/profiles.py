@@ -0,0 +1,42 @@
+from students.cacheversions import bumpCacheVersion, getVersioned
+from students.models import students
+
+PROFILE_CACHE_TIMEOUT = 60 * 15
+
+# the cached profile carries the name of the branch, renaming a department moves every profile on
+DEPARTMENTS_VERSION = 'departments'
+
+
+def profileVersionName(userId):
+    return f'student-profile:{userId}'
+
+
+def getStudentProfile(user):
+    """Loads the student profile of the user from the shared cache, the entry is stored with the profile version of the user and the
+    departments version, both bumped on save, so a cached profile costs one cache round trip and no query
+
+    Args:
+        user (User): authenticated user
+
+    Returns:
+        students | None: student profile of the user, None if the user is anonymous or hasn't completed the profile yet
+    """
+    if not user.is_authenticated:
+        return None
+
+    # users that have not completed their profile yet are cached as None as well, they don't hit the database on every request either
+    return getVersioned(
+        f'student-profile:{user.id}',
+        [profileVersionName(user.id), DEPARTMENTS_VERSION],
+        lambda: students.objects.select_related('branch').filter(student_id = user.id).first(),
+        PROFILE_CACHE_TIMEOUT,
+    )
+
+
+def invalidateStudentProfile(userId):
+    """Bumps the profile version of the user once the transaction commits, so the next request of every worker reloads it
+
+    Args:
+        userId (int): id of the auth user
+    """
+    bumpCacheVersion(profileVersionName(userId))
@@ -0,0 +1,182 @@
+import logging
+import os
+import re
+import time
+import traceback
+from hashlib import md5
+from threading import Lock, local
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger('students.slowqueries')
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# slow queries of this process waiting to be written to the slowQueries table, keyed by fingerprint
+_pending = {}
+_pendingLock = Lock()
+_lastFlush = [time.monotonic()]
+# fingerprints whose plan this process has already captured
+_explained = set()
+# set while the logger runs its own queries so they are not logged themselves
+_state = local()
+
+
+def fingerprint(sql):
+    """Normalizes the SQL so that queries differing only in the length of IN lists or in whitespace share the same fingerprint, the values are already placeholders
+
+    Args:
+        sql (str): SQL sent to the database
+
+    Returns:
+        tuple: md5 of the normalized SQL and the normalized SQL
+    """
+    normalized = re.sub(r'IN \((%s,? ?)+\)', 'IN (...)', sql)
+    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    return md5(normalized.encode()).hexdigest(), normalized
+
+
+def findCaller():
+    # the innermost frame inside the students app that isn't this module, usually the view that ran the ORM call
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(APP_DIR) and not frame.filename.endswith('querylog.py'):
+            return f'{os.path.relpath(frame.filename, os.path.dirname(APP_DIR))}:{frame.lineno} in {frame.name}'
+    return 'unknown'
+
+
+def explainQuery(connection, sql, params):
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return '\n'.join(' | '.join(str(column) for column in row) for row in cursor.fetchall())
+    except Exception as e:
+        return f'EXPLAIN failed: {e}'
+
+
+class SlowQueryLogger:
+    """Execute wrapper that times every query of the connection, queries slower than SLOW_QUERY_THRESHOLD_MS are logged with the calling line of the app,
+    their plan is captured on the first occurrence of each fingerprint and their statistics are aggregated in memory, maybeFlushSlowQueries writes them
+    to the slowQueries table at the end of a request
+    """
+
+    def __init__(self, thresholdMs):
+        self.thresholdMs = thresholdMs
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_state, 'active', False):
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            durationMs = (time.perf_counter() - start) * 1000
+            if durationMs >= self.thresholdMs:
+                _state.active = True
+                try:
+                    self.record(context['connection'], sql, params, many, durationMs)
+                except Exception:
+                    # the instrumentation must never break the query it measures
+                    logger.exception("Slow query logging failed")
+                finally:
+                    _state.active = False
+
+    def record(self, connection, sql, params, many, durationMs):
+        key, normalized = fingerprint(sql)
+        caller = findCaller()
+        logger.warning("Slow query (%.1f ms) from %s: %s", durationMs, caller, normalized)
+
+        explain = ''
+        if key not in _explained and not many:
+            _explained.add(key)
+            explain = explainQuery(connection, sql, params)
+
+        with _pendingLock:
+            stats = _pending.setdefault(key, {'sql': normalized, 'caller': caller, 'calls': 0, 'total_ms': 0, 'max_ms': 0, 'explain': ''})
+            stats['calls'] += 1
+            stats['total_ms'] += durationMs
+            stats['max_ms'] = max(stats['max_ms'], durationMs)
+            stats['caller'] = caller
+            stats['explain'] = stats['explain'] or explain
+
+
+def addToSlowQuery(key, stats, now):
+    from students.models import slowQueries
+
+    return slowQueries.objects.filter(fingerprint = key).update(
+        calls = F('calls') + stats['calls'],
+        total_ms = F('total_ms') + stats['total_ms'],
+        max_ms = Greatest('max_ms', stats['max_ms']),
+        caller = stats['caller'][:255],
+        last_seen = now,
+    )
+
+
+def flushSlowQueries():
+    """Writes the statistics collected by this process into the slowQueries table, adding to the rows other processes already wrote"""
+    with _pendingLock:
+        pending = dict(_pending)
+        _pending.clear()
+        _lastFlush[0] = time.monotonic()
+
+    # the queries of the flush are not measured themselves
+    _state.active = True
+    try:
+        writeSlowQueries(pending)
+    finally:
+        _state.active = False
+
+
+def maybeFlushSlowQueries(**kwargs):
+    """Flushes the statistics once they are older than SLOW_QUERY_FLUSH_SECONDS, connected to request_finished so the flush never runs in the middle of
+    a request and never adds to the duration of the query that happened to cross the interval
+    """
+    # a rolled back transaction would take the statistics with it, so they are only written outside of transactions
+    if not _pending or transaction.get_connection().in_atomic_block or time.monotonic() - _lastFlush[0] < settings.SLOW_QUERY_FLUSH_SECONDS:
+        return
+    try:
+        flushSlowQueries()
+    except Exception:
+        logger.exception("Slow query flush failed")
+
+
+def writeSlowQueries(pending):
+    from students.models import slowQueries
+
+    now = timezone.now()
+    for key, stats in pending.items():
+        updated = addToSlowQuery(key, stats, now)
+        if not updated:
+            try:
+                # the savepoint keeps a failed insert from breaking a surrounding transaction
+                with transaction.atomic():
+                    slowQueries.objects.create(
+                        fingerprint = key,
+                        sql = stats['sql'],
+                        caller = stats['caller'][:255],
+                        calls = stats['calls'],
+                        total_ms = stats['total_ms'],
+                        max_ms = stats['max_ms'],
+                        explain = stats['explain'],
+                        last_seen = now,
+                    )
+            except IntegrityError:
+                # another process inserted the fingerprint between the update and the insert, its row takes the samples instead
+                updated = addToSlowQuery(key, stats, now)
+        if updated and stats['explain']:
+            slowQueries.objects.filter(fingerprint = key, explain = '').update(explain = stats['explain'])
+
+
+def installSlowQueryLogger(sender, connection, **kwargs):
+    """connection_created receiver that adds the slow query logger to every new database connection when SLOW_QUERY_THRESHOLD_MS is set"""
+    thresholdMs = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+    if thresholdMs is None:
+        return
+    if not any(isinstance(wrapper, SlowQueryLogger) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(SlowQueryLogger(thresholdMs))
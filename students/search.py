@@ -0,0 +1,194 @@
+from bisect import bisect_left, insort
+from datetime import date
+from threading import Lock
+
+from students.cacheversions import bumpCacheVersion, cacheVersion
+from students.changefeed import purgedThrough, sequencedThrough
+from students.models import students, changeLog
+
+# ages outside this range can't be turned into a date of birth and are ignored
+MAX_AGE = 120
+
+STUDENTS_VERSION = 'students'
+# past this many changed students a rebuild is cheaper than patching the index one student at a time
+MAX_INCREMENTAL_CHANGES = 1000
+
+# sorted (token, student id) pairs of this process with the tokens of every student, patched with the students changed since seq
+# whenever the shared students version moves
+_prefixIndex = {'version': None, 'seq': 0, 'entries': [], 'tokens': {}}
+_prefixIndexLock = Lock()
+
+
+def studentTokens(firstName, lastName, email):
+    return {token.lower() for token in (firstName, lastName, f'{firstName} {lastName}', email) if token}
+
+
+def indexedStudents(studentsQs):
+    for id, firstName, lastName, email in studentsQs.values_list('id', 'student__first_name', 'student__last_name', 'student__email').iterator(chunk_size=2000):
+        yield id, studentTokens(firstName, lastName, email)
+
+
+def buildPrefixIndex():
+    """Builds the sorted list of lowercase first name, last name, full name and email tokens of every student
+
+    Returns:
+        tuple: sorted list of (token, student id) pairs and the tokens of every student
+    """
+    tokensById = dict(indexedStudents(students.objects.all()))
+    entries = sorted((token, id) for id, tokens in tokensById.items() for token in tokens)
+    return entries, tokensById
+
+
+def patchPrefixIndex(index, studentIds):
+    """Takes the old tokens of the changed students out of a copy of the index and puts their current ones back, deleted students just leave.
+    Lookups of other threads keep reading the old lists until the copy replaces them
+
+    Args:
+        index (dict): current prefix index
+        studentIds (set): ids of the changed students
+
+    Returns:
+        tuple: patched list of (token, student id) pairs and the tokens of every student
+    """
+    entries, tokensById = list(index['entries']), dict(index['tokens'])
+    for studentId in studentIds:
+        for token in tokensById.pop(studentId, ()):
+            position = bisect_left(entries, (token, studentId))
+            if position < len(entries) and entries[position] == (token, studentId):
+                del entries[position]
+    for studentId, tokens in indexedStudents(students.objects.filter(id__in = studentIds)):
+        tokensById[studentId] = tokens
+        for token in tokens:
+            insort(entries, (token, studentId))
+    return entries, tokensById
+
+
+def changedStudentIds(seq):
+    """Students changed after the given sequence number of the change log, None when the index has to be rebuilt instead
+
+    Args:
+        seq (int): sequence number the index is up to date with
+
+    Returns:
+        tuple: set of changed student ids or None, and the sequence number the index is up to date with afterwards
+    """
+    latest = sequencedThrough()
+    # the deletions behind a purged sequence number are gone from the log
+    if seq < purgedThrough():
+        return None, latest
+    studentIds = set(changeLog.objects.filter(seq__gt = seq, seq__lte = latest, table_name = 'students').values_list('row_id', flat=True)[:MAX_INCREMENTAL_CHANGES + 1])
+    if len(studentIds) > MAX_INCREMENTAL_CHANGES:
+        return None, latest
+    return studentIds, latest
+
+
+def prefixIndex():
+    # one read of the shared version per lookup, the log is only read when a worker saved or deleted a student
+    version = cacheVersion(STUDENTS_VERSION)
+    if _prefixIndex['version'] != version:
+        with _prefixIndexLock:
+            if _prefixIndex['version'] != version:
+                studentIds, seq = changedStudentIds(_prefixIndex['seq']) if _prefixIndex['version'] is not None else (None, sequencedThrough())
+                entries, tokensById = buildPrefixIndex() if studentIds is None else patchPrefixIndex(_prefixIndex, studentIds)
+                _prefixIndex.update(version = version, seq = seq, entries = entries, tokens = tokensById)
+    return _prefixIndex
+
+
+def invalidatePrefixIndex():
+    bumpCacheVersion(STUDENTS_VERSION)
+
+
+def matchingStudentIds(prefix, limit=None):
+    """Finds the students whose first name, last name, full name or email starts with the given prefix using a binary search over the prefix index
+
+    Args:
+        prefix (str): text typed by the admin
+        limit (int, optional): maximum number of student ids to return
+
+    Returns:
+        list: ids of the matching students in the order of the matching token, without duplicates
+    """
+    prefix = prefix.strip().lower()
+    if not prefix:
+        return []
+
+    entries = prefixIndex()['entries']
+
+    matches = []
+    seen = set()
+    # a one element tuple sorts right before every pair that starts with the same token
+    position = bisect_left(entries, (prefix,))
+    while position < len(entries) and entries[position][0].startswith(prefix):
+        studentId = entries[position][1]
+        if studentId not in seen:
+            seen.add(studentId)
+            matches.append(studentId)
+            if limit and len(matches) >= limit:
+                break
+        position += 1
+    return matches
+
+
+def yearsAgo(years):
+    today = date.today()
+    try:
+        return today.replace(year = today.year - years)
+    except ValueError:
+        # 29th of February in a non leap year
+        return today.replace(year = today.year - years, day = 28)
+
+
+def intCriterion(criteria, name):
+    # blank or malformed values are ignored instead of failing the whole search
+    try:
+        return int(criteria.get(name, ''))
+    except ValueError:
+        return None
+
+
+def ageCriterion(criteria, name):
+    age = intCriterion(criteria, name)
+    if age is None or not 0 <= age <= MAX_AGE:
+        return None
+    return age
+
+
+def searchStudents(criteria):
+    """Filters the students on the given criteria, every filter runs on an index of the students table and
+    name or email prefixes are resolved to ids through the in process prefix index
+
+    Args:
+        criteria (QueryDict): search parameters, any of search, branch, year, semester, minAge, maxAge and contact
+
+    Returns:
+        QuerySet: matching students
+    """
+    studentsQs = students.objects.all()
+
+    search = criteria.get('search', '').strip()
+    if search:
+        studentsQs = studentsQs.filter(id__in = matchingStudentIds(search))
+
+    branch = intCriterion(criteria, 'branch')
+    if branch is not None:
+        studentsQs = studentsQs.filter(branch_id = branch)
+    year = intCriterion(criteria, 'year')
+    if year is not None:
+        studentsQs = studentsQs.filter(yos = year)
+    semester = intCriterion(criteria, 'semester')
+    if semester is not None:
+        studentsQs = studentsQs.filter(semester = semester)
+
+    # a student is at least minAge years old if born on or before minAge years ago
+    minAge = ageCriterion(criteria, 'minAge')
+    if minAge is not None:
+        studentsQs = studentsQs.filter(dob__lte = yearsAgo(minAge))
+    maxAge = ageCriterion(criteria, 'maxAge')
+    if maxAge is not None:
+        studentsQs = studentsQs.filter(dob__gt = yearsAgo(maxAge + 1))
+
+    contact = intCriterion(criteria, 'contact')
+    if contact is not None:
+        studentsQs = studentsQs.filter(contact = contact)
+
+    return studentsQs
@@ -0,0 +1,90 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+# session engine picked by SESSION_MODE, this module wraps it so SessionMetricsMiddleware can report what each request did with the session
+backend = import_module(settings.SESSION_BACKEND)
+
+# number of expired sessions deleted per statement
+CLEANUP_BATCH_SIZE = 1000
+
+
+class SessionStore(backend.SessionStore):
+    """Session store of SESSION_BACKEND that counts its reads and writes, a new store is created for every request so the counts are per request"""
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self.reads = 0
+        self.writes = 0
+        self._saving = False
+
+    def load(self):
+        self.reads += 1
+        return super().load()
+
+    async def aload(self):
+        self.reads += 1
+        return await super().aload()
+
+    def exists(self, session_key):
+        self.reads += 1
+        return super().exists(session_key)
+
+    async def aexists(self, session_key):
+        self.reads += 1
+        return await super().aexists(session_key)
+
+    def save(self, must_create=False):
+        # a session without a key is saved through create(), which calls save() again, both calls are the same write
+        nested, self._saving = self._saving, True
+        try:
+            self.writes += not nested
+            return super().save(must_create)
+        finally:
+            self._saving = nested
+
+    async def asave(self, must_create=False):
+        nested, self._saving = self._saving, True
+        try:
+            self.writes += not nested
+            return await super().asave(must_create)
+        finally:
+            self._saving = nested
+
+    def delete(self, session_key=None):
+        self.writes += 1
+        return super().delete(session_key)
+
+    async def adelete(self, session_key=None):
+        self.writes += 1
+        return await super().adelete(session_key)
+
+
+def storesInDatabase():
+    return settings.SESSION_BACKEND in ('django.contrib.sessions.backends.db', 'django.contrib.sessions.backends.cached_db')
+
+
+def clearExpiredSessions(batchSize=CLEANUP_BATCH_SIZE):
+    """Deletes the expired sessions of the database one batch per statement, so a large backlog never holds the locks of one huge DELETE,
+    the cache and signed cookie modes have nothing to clean up since their sessions expire on their own
+
+    Args:
+        batchSize (int, optional): number of sessions deleted per statement
+
+    Returns:
+        int: number of sessions deleted
+    """
+    if not storesInDatabase():
+        return 0
+
+    deleted = 0
+    now = timezone.now()
+    while True:
+        # the batch is read off the index on expire_date and deleted by primary key
+        sessionKeys = list(Session.objects.filter(expire_date__lt = now).values_list('session_key', flat = True)[:batchSize])
+        if not sessionKeys:
+            break
+        deleted += Session.objects.filter(session_key__in = sessionKeys).delete()[0]
+    return deleted
@@ -0,0 +1,102 @@
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from students.cacheversions import bumpCacheVersion
+from students.catalog import invalidateCatalog
+from students.changefeed import logChanges
+from students.dashboard import invalidateAdminDashboard
+from students.eligibility import invalidatePrerequisites
+from students.enrollments import adjustSeats, promoteWaitlistIfFree
+from students.live import notifyLiveHub
+from students.profiles import invalidateStudentProfile, DEPARTMENTS_VERSION
+from students.search import invalidatePrefixIndex
+from students.models import students, courses, enrollment, departments, hods, prerequisite
+
+# fields of the user that are part of the student prefix index
+INDEXED_USER_FIELDS = {'first_name', 'last_name', 'email'}
+
+
+@receiver(post_save, sender=students)
+@receiver(post_delete, sender=students)
+def studentProfileChanged(sender, instance, **kwargs):
+    invalidateStudentProfile(instance.student_id)
+    invalidatePrefixIndex()
+    invalidateAdminDashboard()
+    transaction.on_commit(notifyLiveHub)
+
+
+@receiver(post_save, sender=courses)
+@receiver(post_delete, sender=courses)
+def courseChanged(sender, instance, **kwargs):
+    invalidateCatalog()
+    invalidateAdminDashboard()
+    transaction.on_commit(notifyLiveHub)
+
+
+@receiver(post_save, sender=courses)
+def courseSaved(sender, instance, created=False, **kwargs):
+    # a raised capacity, from the course page or the admin, hands the new seats to the waitlist
+    if not created:
+        transaction.on_commit(partial(promoteWaitlistIfFree, instance.id))
+
+
+@receiver(post_save, sender=departments)
+@receiver(post_save, sender=hods)
+def courseNamesChanged(sender, instance, created=False, **kwargs):
+    # the course cards show the department and HOD names, departments and HODs still used by a course can't be deleted
+    if not created:
+        field = 'department' if sender is departments else 'HOD'
+        courses.objects.filter(**{field: instance}).update(updated_at = timezone.now())
+        invalidateCatalog()
+        if sender is departments:
+            bumpCacheVersion(DEPARTMENTS_VERSION)
+
+
+@receiver(post_save, sender=prerequisite)
+@receiver(post_delete, sender=prerequisite)
+def prerequisiteChanged(sender, instance, **kwargs):
+    invalidatePrerequisites()
+
+
+@receiver(post_save, sender=User)
+def userChanged(sender, instance, update_fields=None, **kwargs):
+    # logins and password changes only save last_login or password, they must not rebuild the prefix index
+    if update_fields is None or INDEXED_USER_FIELDS & set(update_fields):
+        studentIds = list(students.objects.filter(student_id = instance.id).values_list('id', flat=True))
+        if studentIds:
+            # the name and email are part of the student rows of the change feed, the prefix index patches the students it finds there
+            students.objects.filter(id__in = studentIds).update(updated_at = timezone.now())
+            logChanges(students, studentIds)
+            invalidatePrefixIndex()
+            invalidateStudentProfile(instance.id)
+
+
+@receiver(post_delete, sender=enrollment)
+def enrollmentDeleted(sender, instance, origin=None, **kwargs):
+    # deleting a student or an enrollment frees the seat, deleting the whole course leaves nothing to free
+    deletedCourse = isinstance(origin, courses) or (isinstance(origin, QuerySet) and origin.model is courses)
+    if instance.status == 'ongoing' and not deletedCourse:
+        adjustSeats({instance.course_id: -1})
+    transaction.on_commit(notifyLiveHub)
+
+
+@receiver(post_save, sender=students)
+@receiver(post_save, sender=courses)
+@receiver(post_save, sender=enrollment)
+def feedRowSaved(sender, instance, **kwargs):
+    # post_save runs after the INSERT or UPDATE on the same connection, the entry commits with the row when the caller holds a transaction
+    logChanges(sender, [instance.id])
+
+
+@receiver(post_delete, sender=students)
+@receiver(post_delete, sender=courses)
+@receiver(post_delete, sender=enrollment)
+def feedRowDeleted(sender, instance, **kwargs):
+    # deletes, cascades included, send post_delete inside the transaction of the delete itself
+    logChanges(sender, [instance.id], 'delete')
@@ -0,0 +1,69 @@
+// Loads the next batch of cards into the list when the sentinel below it scrolls into view,
+// and replaces the cards in place on search instead of reloading the whole page.
+// The container needs a data-fragment-url, the server sends the cursor of the following batch in X-Next-Cursor.
+document.addEventListener("DOMContentLoaded", () => {
+  const container = document.querySelector("[data-fragment-url]");
+  const sentinel = document.querySelector(".scroll-sentinel");
+  const searchForm = document.querySelector(".fragment-search");
+  if (!container || !sentinel) return;
+
+  const fragmentUrl = container.dataset.fragmentUrl;
+  let query = new URLSearchParams(window.location.search);
+  // every request gets a generation, a search starts a new one so a batch of the old query still in flight is aborted and never appended
+  let generation = 0;
+  let pending = null;
+
+  function loadBatch(cursor, replace) {
+    if (pending && !replace) return Promise.resolve();
+    if (pending) pending.abort();
+
+    const current = ++generation;
+    const controller = new AbortController();
+    pending = controller;
+
+    const params = new URLSearchParams(query);
+    params.set("cursor", cursor);
+
+    return fetch(`${fragmentUrl}?${params.toString()}`, { signal: controller.signal })
+      .then(response => response.text().then(html => ({ response, html })))
+      .then(({ response, html }) => {
+        if (current !== generation) return;
+        sentinel.dataset.nextCursor = response.headers.get("X-Next-Cursor") || "";
+        const total = response.headers.get("X-Total-Count");
+        const totalEl = document.getElementById("total-count");
+        if (total !== null && totalEl) totalEl.innerText = total;
+        if (replace) container.innerHTML = html;
+        else container.insertAdjacentHTML("beforeend", html);
+        // the observer only fires when the visibility changes, a short batch leaves the sentinel in view,
+        // observing it again reports where it is now and loads the next batch if it is still visible
+        observer.unobserve(sentinel);
+        observer.observe(sentinel);
+      })
+      .catch(error => {
+        if (error.name !== "AbortError") throw error;
+      })
+      .finally(() => {
+        if (current === generation) pending = null;
+      });
+  }
+
+  const observer = new IntersectionObserver(entries => {
+    const cursor = sentinel.dataset.nextCursor;
+    if (entries[0].isIntersecting && cursor) {
+      loadBatch(cursor, false);
+    }
+  }, { rootMargin: "300px" });
+  observer.observe(sentinel);
+
+  if (searchForm) {
+    searchForm.addEventListener("submit", event => {
+      event.preventDefault();
+      query = new URLSearchParams(new FormData(searchForm));
+      for (const [key, value] of [...query.entries()]) {
+        if (!value) query.delete(key);
+      }
+      window.history.replaceState(null, "", `?${query.toString()}`);
+      loadBatch("", true);
+    });
+  }
+});
@@ -0,0 +1,13 @@
+from django import template
+
+from students.photos import photoUrl
+
+register = template.Library()
+
+
+@register.simple_tag
+def studentPhoto(student, variant):
+    """URL of a thumbnail of the student photo, {% studentPhoto request.student 'card' %}, the placeholder for users without a profile or photo"""
+    if not student:
+        return photoUrl('', False, variant)
+    return photoUrl(student.photo.name, student.photo_thumbnails, variant)
@@ -1,3 +1,897 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from importlib import import_module
+from io import BytesIO, StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Barrier
+from unittest import mock
+from uuid import uuid4
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from PIL import Image
+
+from students import audit, querylog
+from students.archive import archiveGraduatedStudents, graduatedStudents, restoreStudent
+from students.catalog import COURSES_BATCH_SIZE, catalogPage
+from students.changefeed import CHANGE_FEED_MAX_BATCH_SIZE, changesSince, compactChangeLog, purgeChangeLog, purgedThrough
+from students.eligibility import eligibleCourses, resolveClosure
+from students import search
+from students.search import matchingStudentIds, searchStudents, yearsAgo
+from students.live import LiveHub, studentTopic
+from students.querylog import SlowQueryLogger, fingerprint, maybeFlushSlowQueries
+from students.sessions import SessionStore, clearExpiredSessions
+from students.views import STUDENTS_BATCH_SIZE
+from students.enrollments import enrollOrWaitlist, bulkChangeStatus
+from students.photos import PHOTO_VARIANTS, deleteUnusedPhotos, generateThumbnails, storePhoto, thumbnailName, photoHash
+from students.profiles import getStudentProfile
+from students.models import students, courses, enrollment, departments, hods, waitlist, prerequisite, changeLog, studentsArchive, auditLog, slowQueries
+
+
+def createCourse(capacity):
+    department = departments.objects.create(name = 'Computer Science')
+    hod = hods.objects.create(name = 'Dr. Sharma')
+    return courses.objects.create(name = 'Operating Systems', department = department, HOD = hod, enrolled_students = 0, capacity = capacity)
+
+
+def createStudents(count, branch):
+    studentIds = []
+    for i in range(count):
+        user = User.objects.create(username = f'student{i}@example.com', email = f'student{i}@example.com')
+        studentIds.append(students.objects.create(student = user, contact = 9000000000 + i, branch = branch, yos = 1, address = 'Patiala').id)
+    return studentIds
+
+
+# SQLite serializes writers with a database wide lock, the test needs a server database that allows parallel transactions
+@skipUnlessDBFeature('has_select_for_update')
+class SeatAllocationStressTest(TransactionTestCase):
+
+    def test_parallel_enrollments_never_exceed_capacity(self):
+        capacity = 10
+        workers = 40
+        course = createCourse(capacity)
+        studentIds = createStudents(workers, course.department)
+        barrier = Barrier(workers)
+
+        def enroll(studentId):
+            try:
+                # every thread fires at the same moment to make the seats as contended as possible
+                barrier.wait()
+                return enrollOrWaitlist(studentId, course.id)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers = workers) as executor:
+            results = list(executor.map(enroll, studentIds))
+
+        course.refresh_from_db()
+        self.assertEqual(results.count('ongoing'), capacity)
+        self.assertEqual(results.count('waitlisted'), workers - capacity)
+        self.assertEqual(course.enrolled_students, capacity)
+        self.assertEqual(enrollment.objects.filter(course = course, status = 'ongoing').count(), capacity)
+        self.assertEqual(waitlist.objects.filter(course = course).count(), workers - capacity)
+
+
+class WaitlistPromotionTest(TestCase):
+
+    def test_freed_seats_go_to_the_waitlist_in_order(self):
+        course = createCourse(capacity = 2)
+        studentIds = createStudents(5, course.department)
+
+        with self.captureOnCommitCallbacks(execute = True):
+            for studentId in studentIds:
+                enrollOrWaitlist(studentId, course.id)
+        self.assertEqual(list(waitlist.objects.order_by('id').values_list('student_id', flat = True)), studentIds[2:])
+
+        with self.captureOnCommitCallbacks(execute = True):
+            bulkChangeStatus(enrollment.objects.filter(course = course, student_id__in = studentIds[:2]), 'pass')
+
+        course.refresh_from_db()
+        self.assertEqual(course.enrolled_students, 2)
+        self.assertEqual(set(enrollment.objects.filter(course = course, status = 'ongoing').values_list('student_id', flat = True)), set(studentIds[2:4]))
+        self.assertEqual(list(waitlist.objects.values_list('student_id', flat = True)), studentIds[4:])
+
+    def test_deleting_a_student_frees_the_seat(self):
+        course = createCourse(capacity = 1)
+        studentIds = createStudents(2, course.department)
+
+        with self.captureOnCommitCallbacks(execute = True):
+            for studentId in studentIds:
+                enrollOrWaitlist(studentId, course.id)
+            students.objects.get(id = studentIds[0]).delete()
+
+        course.refresh_from_db()
+        self.assertEqual(course.enrolled_students, 1)
+        self.assertTrue(enrollment.objects.filter(course = course, student_id = studentIds[1], status = 'ongoing').exists())
+        self.assertFalse(waitlist.objects.exists())
+
+    def fullCourseWithWaitlist(self, waiting):
+        course = createCourse(capacity = 1)
+        studentIds = createStudents(1 + waiting, course.department)
+        with self.captureOnCommitCallbacks(execute = True):
+            for studentId in studentIds:
+                enrollOrWaitlist(studentId, course.id)
+        return course, studentIds
+
+    def ongoingCount(self, studentId, course):
+        return enrollment.objects.filter(student_id = studentId, course = course, status = 'ongoing').count()
+
+    def test_raising_the_capacity_promotes_the_waitlist(self):
+        course, (first, second) = self.fullCourseWithWaitlist(1)
+
+        with self.captureOnCommitCallbacks(execute = True):
+            course.refresh_from_db()
+            course.capacity = 2
+            course.save()
+        self.assertEqual(self.ongoingCount(second, course), 1)
+        self.assertFalse(waitlist.objects.exists())
+
+        # asking again, or the seat of the first student going to the queue, never enrolls the student a second time
+        with self.captureOnCommitCallbacks(execute = True):
+            self.assertEqual(enrollOrWaitlist(second, course.id), 'ongoing')
+            bulkChangeStatus(enrollment.objects.filter(student_id = first), 'pass')
+        self.assertEqual(self.ongoingCount(second, course), 1)
+        course.refresh_from_db()
+        self.assertEqual(course.enrolled_students, 1)
+
+    def test_newcomers_queue_behind_the_waitlist(self):
+        course, (_, waiting, newcomer) = self.fullCourseWithWaitlist(2)
+        waitlist.objects.filter(student_id = newcomer).delete()
+        # a seat freed without promoting anyone yet
+        courses.objects.filter(id = course.id).update(capacity = 2)
+
+        with self.captureOnCommitCallbacks(execute = True):
+            self.assertEqual(enrollOrWaitlist(newcomer, course.id), 'waitlisted')
+        self.assertEqual(self.ongoingCount(waiting, course), 1)
+        self.assertEqual(list(waitlist.objects.values_list('student_id', flat = True)), [newcomer])
+
+    def test_the_only_waiting_student_takes_a_free_seat_and_leaves_the_waitlist(self):
+        course, (_, waiting) = self.fullCourseWithWaitlist(1)
+        courses.objects.filter(id = course.id).update(capacity = 2)
+
+        self.assertEqual(enrollOrWaitlist(waiting, course.id), 'ongoing')
+        self.assertEqual(self.ongoingCount(waiting, course), 1)
+        self.assertFalse(waitlist.objects.exists())
+
+
+# the query counts are the ones of the code under test, the database cache of the default settings would add its own
+@override_settings(CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class EligibilityTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_closure_follows_chains_and_marks_cycles(self):
+        closure = resolveClosure([(3, 2), (2, 1), (5, 4), (4, 5)])
+        self.assertEqual(closure[3], {1, 2})
+        self.assertEqual(closure[2], {1})
+        self.assertIn(5, closure[5])
+
+    def test_courses_need_their_whole_prerequisite_chain_passed(self):
+        basics = createCourse(capacity = None)
+        department, hod = basics.department, basics.HOD
+        advanced = courses.objects.create(name = 'Distributed Systems', department = department, HOD = hod, enrolled_students = 0, year = 2, semester = 3)
+        intermediate = courses.objects.create(name = 'Networks', department = department, HOD = hod, enrolled_students = 0, year = 1, semester = 2)
+        ethics = courses.objects.create(name = 'Ethics', department = department, HOD = hod, enrolled_students = 0, year = 2, semester = 3)
+        prerequisite.objects.create(course = intermediate, required = basics)
+        prerequisite.objects.create(course = advanced, required = intermediate)
+
+        studentIds = createStudents(3, department)
+        students.objects.filter(id__in = studentIds).update(yos = 2, semester = 3)
+        # the first student passed the whole chain, the second skipped the basics, the third passed nothing
+        enrollment.objects.create(student_id = studentIds[0], course = basics, status = 'pass')
+        enrollment.objects.create(student_id = studentIds[0], course = intermediate, status = 'pass')
+        enrollment.objects.create(student_id = studentIds[1], course = intermediate, status = 'pass')
+        enrollment.objects.create(student_id = studentIds[2], course = ethics, status = 'ongoing')
+
+        with self.assertNumQueries(5):
+            eligible = eligibleCourses(students.objects.filter(id__in = studentIds))
+        with self.assertNumQueries(4):
+            self.assertEqual(eligibleCourses(students.objects.filter(id__in = studentIds)), eligible)
+
+        self.assertEqual(eligible[studentIds[0]], {advanced.id, ethics.id})
+        self.assertEqual(eligible[studentIds[1]], {ethics.id})
+        self.assertEqual(eligible[studentIds[2]], set())
+
+        # a prerequisite added in any worker bumps the shared version once it commits
+        with self.captureOnCommitCallbacks(execute = True):
+            prerequisite.objects.create(course = ethics, required = advanced)
+        self.assertEqual(eligibleCourses(students.objects.filter(id__in = studentIds))[studentIds[0]], {advanced.id})
+
+    def test_waitlisted_courses_are_not_eligible_again(self):
+        course = createCourse(capacity = 1)
+        studentIds = createStudents(2, course.department)
+        students.objects.filter(id__in = studentIds).update(yos = course.year, semester = course.semester)
+        waitlist.objects.create(student_id = studentIds[0], course = course)
+
+        eligible = eligibleCourses(students.objects.filter(id__in = studentIds))
+        self.assertEqual(eligible[studentIds[0]], set())
+        self.assertEqual(eligible[studentIds[1]], {course.id})
+
+
+class ChangeFeedTest(TestCase):
+
+    def caughtUpCursor(self):
+        return changesSince(0, CHANGE_FEED_MAX_BATCH_SIZE)['next']
+
+    def test_feed_sends_each_changed_row_once_with_its_latest_state(self):
+        course = createCourse(capacity = 1)
+        studentIds = createStudents(2, course.department)
+        cursor = self.caughtUpCursor()
+
+        with self.captureOnCommitCallbacks(execute = True):
+            for studentId in studentIds:
+                enrollOrWaitlist(studentId, course.id)
+            bulkChangeStatus(enrollment.objects.filter(course = course), 'pass')
+
+        page = changesSince(cursor)
+        changes = {(change['table'], change['id']): change for change in page['changes']}
+        # the seat taken, freed and handed to the waitlist is one course change, the passed and the promoted enrollment one change each
+        self.assertEqual(len(page['changes']), 3)
+        self.assertEqual(changes[('courses', course.id)]['row']['enrolled_students'], 1)
+        self.assertEqual({change['row']['status'] for change in page['changes'] if change['table'] == 'enrollment'}, {'pass', 'ongoing'})
+        self.assertEqual(page['next'], changeLog.objects.latest('id').seq)
+
+        course.delete()
+        page = changesSince(page['next'])
+        self.assertEqual({(change['table'], change['op']) for change in page['changes']}, {('courses', 'delete'), ('enrollment', 'delete')})
+
+    def test_rolled_back_writes_leave_no_entry(self):
+        course = createCourse(capacity = None)
+        cursor = changeLog.objects.latest('id').id
+
+        with self.assertRaises(ValueError), transaction.atomic():
+            course.save()
+            raise ValueError
+
+        self.assertFalse(changeLog.objects.filter(id__gt = cursor).exists())
+
+    def purgeDeletedStudent(self):
+        course = createCourse(capacity = None)
+        studentIds = createStudents(2, course.department)
+        students.objects.filter(id = studentIds[0]).delete()
+        self.caughtUpCursor()
+        changeLog.objects.update(created_at = timezone.now() - timedelta(days = 40))
+        return studentIds
+
+    def test_entries_committed_late_are_sent_after_the_cursor(self):
+        course = createCourse(capacity = None)
+        cursor = self.caughtUpCursor()
+        # the entry of a long transaction takes its id first but commits after a newer entry was already read
+        lateEntry = changeLog.objects.create(table_name = 'courses', row_id = course.id, operation = 'upsert')
+        lateEntry.delete()
+        students.objects.create(student = User.objects.create(username = 'late@example.com'), contact = 9000000000, branch = course.department, yos = 1, address = 'Patiala')
+        cursor = changesSince(cursor)['next']
+
+        changeLog.objects.create(id = lateEntry.id, table_name = 'courses', row_id = course.id, operation = 'upsert')
+        self.assertEqual([(change['table'], change['id']) for change in changesSince(cursor)['changes']], [('courses', course.id)])
+
+    def test_compaction_keeps_the_latest_entry_and_purge_drops_old_deletions(self):
+        studentIds = self.purgeDeletedStudent()
+        deleteSeq = changeLog.objects.get(table_name = 'students', row_id = studentIds[0], operation = 'delete').seq
+
+        self.assertGreater(compactChangeLog(), 0)
+        self.assertEqual(list(changeLog.objects.filter(table_name = 'students', row_id = studentIds[0]).values_list('operation', flat = True)), ['delete'])
+        self.assertTrue(changeLog.objects.filter(table_name = 'students', row_id = studentIds[1], operation = 'upsert').exists())
+
+        self.assertEqual(purgeChangeLog(), 1)
+        self.assertFalse(changeLog.objects.filter(table_name = 'students', row_id = studentIds[0]).exists())
+        self.assertEqual(purgedThrough(), deleteSeq)
+
+    def test_feed_needs_the_token_or_an_admin_session(self):
+        self.assertEqual(self.client.get('/student/changes/').status_code, 403)
+        self.client.force_login(User.objects.create(username = 'student@example.com'))
+        self.assertEqual(self.client.get('/student/changes/').status_code, 403)
+        self.client.force_login(User.objects.create(username = 'admin', is_superuser = True))
+        self.assertEqual(self.client.get('/student/changes/').status_code, 200)
+
+        with override_settings(CHANGE_FEED_TOKEN = 'secret'):
+            self.client.logout()
+            self.assertEqual(self.client.get('/student/changes/', headers = {'Authorization': 'Bearer wrong'}).status_code, 403)
+            self.assertEqual(self.client.get('/student/changes/', headers = {'Authorization': 'Bearer secret'}).status_code, 200)
+
+    def test_cursor_behind_purged_deletions_has_to_resync(self):
+        self.purgeDeletedStudent()
+        compactChangeLog()
+        purgeChangeLog()
+        self.client.force_login(User.objects.create(username = 'admin', is_superuser = True))
+
+        response = self.client.get('/student/changes/', {'since': 1})
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.json()['since'], 0)
+
+        # a snapshot from 0 walks below the purged deletions with signed cursors
+        snapshot = self.client.get('/student/changes/', {'since': 0, 'limit': 1}).json()
+        self.assertIn(':', snapshot['next'])
+        self.assertEqual(self.client.get('/student/changes/', {'since': snapshot['next'], 'limit': 1}).status_code, 200)
+        self.assertEqual(self.client.get('/student/changes/', {'since': snapshot['next'] + 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/student/changes/', {'since': '1:1:forged'}).status_code, 400)
+
+        # a purge in the middle of the snapshot sends it back to 0
+        students.objects.all().delete()
+        self.caughtUpCursor()
+        changeLog.objects.update(created_at = timezone.now() - timedelta(days = 40))
+        compactChangeLog()
+        purgeChangeLog()
+        self.assertEqual(self.client.get('/student/changes/', {'since': snapshot['next']}).status_code, 410)
+
+
+class ArchiveTest(TestCase):
+
+    def setUp(self):
+        course = createCourse(capacity = None)
+        otherCourse = courses.objects.create(name = 'Compilers', department = course.department, HOD = course.HOD, enrolled_students = 0, capacity = None)
+        self.studentIds = createStudents(3, course.department)
+        students.objects.update(yos = 4, semester = 8)
+        # passed both courses, only failed, still taking a course
+        for studentId, statuses in zip(self.studentIds, [['pass', 'pass'], ['fail'], ['pass', 'ongoing']]):
+            for enrolledCourse, status in zip([course, otherCourse], statuses):
+                enrollment.objects.create(student_id = studentId, course = enrolledCourse, status = status)
+        enrollment.objects.update(enrollment_date = date(2022, 7, 1))
+
+    def test_only_students_that_passed_and_finished_are_graduated(self):
+        self.assertEqual(list(graduatedStudents().values_list('id', flat = True)), [self.studentIds[0]])
+
+    def test_archive_and_restore_keep_ids_dates_and_account(self):
+        studentId = self.studentIds[0]
+        enrollmentIds = set(enrollment.objects.filter(student_id = studentId).values_list('id', flat = True))
+        userId = students.objects.get(id = studentId).student_id
+
+        self.assertEqual(archiveGraduatedStudents(), 1)
+        self.assertFalse(students.objects.filter(id = studentId).exists())
+        self.assertFalse(enrollment.objects.filter(student_id = studentId).exists())
+        self.assertFalse(User.objects.get(id = userId).is_active)
+
+        restored = restoreStudent(studentsArchive.objects.get(originalId = studentId).id)
+        self.assertEqual(restored.id, studentId)
+        self.assertEqual(set(enrollment.objects.filter(student_id = studentId).values_list('id', flat = True)), enrollmentIds)
+        self.assertEqual(set(enrollment.objects.filter(student_id = studentId).values_list('enrollment_date', flat = True)), {date(2022, 7, 1)})
+        self.assertTrue(User.objects.get(id = userId).is_active)
+        self.assertFalse(studentsArchive.objects.exists())
+
+    def test_only_admins_see_and_restore_the_archive(self):
+        archiveGraduatedStudents()
+        archivedId = studentsArchive.objects.get().id
+        self.client.force_login(User.objects.get(students__id = self.studentIds[1]))
+        self.assertEqual(self.client.get('/student/archive/').status_code, 403)
+        self.assertEqual(self.client.get(f'/student/archive/{archivedId}/').status_code, 403)
+        self.assertEqual(self.client.post(f'/student/archive/{archivedId}/', {'action': 'restore'}).status_code, 403)
+        self.assertTrue(studentsArchive.objects.exists())
+
+        self.client.force_login(User.objects.create(username = 'admin', is_superuser = True))
+        self.assertEqual(self.client.get('/student/archive/').status_code, 200)
+        self.assertRedirects(self.client.post(f'/student/archive/{archivedId}/', {'action': 'restore'}), '/student/students_list/', fetch_redirect_response = False)
+        self.assertFalse(studentsArchive.objects.exists())
+
+
+class AuditLogTest(TransactionTestCase):
+
+    def setUp(self):
+        spool = TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        settingsOverride = override_settings(AUDIT_SPOOL_DIR = spool.name, AUDIT_FLUSH_SIZE = 100, AUDIT_FLUSH_SECONDS = 3600)
+        settingsOverride.enable()
+        self.addCleanup(settingsOverride.disable)
+        self.spoolDir = Path(spool.name)
+        audit._buffer.clear()
+
+    def spooledLines(self):
+        return [line for path in self.spoolDir.iterdir() for line in path.read_text().splitlines()]
+
+    def test_committed_changes_are_spooled_then_inserted_in_one_batch(self):
+        with self.assertRaises(ValueError), transaction.atomic():
+            audit.recordChange(None, 'course.delete', courseId = 1)
+            raise ValueError
+        for courseId in [2, 3]:
+            with transaction.atomic():
+                audit.recordChange(None, 'course.delete', courseId = courseId)
+
+        self.assertEqual(len(self.spooledLines()), 2)
+        self.assertFalse(auditLog.objects.exists())
+
+        self.assertEqual(audit.flushAuditLog(), 2)
+        self.assertEqual(sorted(auditLog.objects.values_list('course_id', flat = True)), [2, 3])
+        self.assertEqual(list(self.spoolDir.iterdir()), [])
+
+    def test_flush_audit_log_replays_left_over_spool_files_once(self):
+        with transaction.atomic():
+            audit.recordChange(None, 'course.delete', courseId = 1)
+        spooled = self.spooledLines()[0]
+        # the spool of a failed flush, repeating an event of the live spool and cut off in the middle of a line
+        (self.spoolDir / f'audit-{os.getpid()}.0.flushing').write_text(spooled + '\n' + spooled[:20])
+
+        with self.assertLogs('students.audit', 'WARNING'):
+            call_command('flush_audit_log', stdout = StringIO())
+        call_command('flush_audit_log', stdout = StringIO())
+
+        self.assertEqual(auditLog.objects.count(), 1)
+        # the spool of this process is still in use and stays
+        self.assertEqual([path.name for path in self.spoolDir.iterdir()], [f'audit-{os.getpid()}.jsonl'])
+
+    def test_history_pages_show_the_trail_of_one_student_or_course_newest_first(self):
+        now = timezone.now()
+        for minutes, studentId, courseId, action in [(3, 1, 10, 'enrollment.create'), (2, 2, 10, 'enrollment.create'), (1, 1, 10, 'enrollment.status')]:
+            auditLog.objects.create(event_id = uuid4(), action = action, student_id = studentId, course_id = courseId, created_at = now - timedelta(minutes = minutes))
+
+        self.assertEqual(self.client.get('/student/audit/student/1/').status_code, 403)
+        self.client.force_login(User.objects.create(username = 'student@example.com'))
+        self.assertEqual(self.client.get('/student/audit/course/10/').status_code, 403)
+
+        self.client.force_login(User.objects.create(username = 'admin', is_superuser = True))
+        response = self.client.get('/student/audit/student/1/')
+        self.assertEqual([event.action for event in response.context['auditQs']], ['enrollment.status', 'enrollment.create'])
+        response = self.client.get('/student/audit/course/10/')
+        self.assertEqual([event.student_id for event in response.context['auditQs']], [1, 2, 1])
+
+    def test_request_end_flush_runs_before_the_connection_is_closed(self):
+        receivers = [receiver[1]() for receiver in request_finished.receivers]
+        self.assertLess(receivers.index(audit.maybeFlushAuditLog), receivers.index(close_old_connections))
+
+
+class ConditionalRequestTest(TestCase):
+
+    def setUp(self):
+        self.course = createCourse(capacity = None)
+        self.studentId = createStudents(1, self.course.department)[0]
+        self.studentUser = User.objects.get(students__id = self.studentId)
+        self.admin = User.objects.create(username = 'admin', is_superuser = True)
+
+    def assertRevalidates(self, url, change):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, headers = {'If-None-Match': etag}).status_code, 304)
+        with self.captureOnCommitCallbacks(execute = True):
+            change()
+        self.assertEqual(self.client.get(url, headers = {'If-None-Match': etag}).status_code, 200)
+
+    def test_profile_revalidates_until_the_student_changes(self):
+        self.client.force_login(self.studentUser)
+        self.assertRevalidates('/student/profile/', lambda: students.objects.get(id = self.studentId).save())
+
+    def test_profile_revalidates_until_the_branch_or_the_user_is_renamed(self):
+        self.client.force_login(self.studentUser)
+        self.assertNotIn('Last-Modified', self.client.get('/student/profile/'))
+
+        def renameBranch():
+            self.course.department.name = 'Computer Engineering'
+            self.course.department.save()
+        self.assertRevalidates('/student/profile/', renameBranch)
+
+        def renameUser():
+            self.studentUser.first_name = 'Zoya'
+            self.studentUser.save()
+        self.assertRevalidates('/student/profile/', renameUser)
+
+    def test_my_courses_revalidate_until_an_enrollment_changes(self):
+        self.client.force_login(self.studentUser)
+        self.assertRevalidates('/student/mycourses/', lambda: enrollment.objects.create(student_id = self.studentId, course = self.course))
+
+    def test_catalog_revalidates_per_user_until_a_course_changes(self):
+        self.client.force_login(self.admin)
+        self.assertRevalidates('/student/courses/', lambda: self.course.save())
+        self.assertRevalidates('/student/courses/', lambda: enrollOrWaitlist(self.studentId, self.course.id))
+
+        # the navbar belongs to the user, another account never gets the cached page of the first one
+        etag = self.client.get('/student/courses/')['ETag']
+        self.client.force_login(self.studentUser)
+        self.assertEqual(self.client.get('/student/courses/', headers = {'If-None-Match': etag}).status_code, 200)
+        self.assertNotIn('Last-Modified', self.client.get('/student/courses/'))
+
+
+class LowercaseStatusMigrationTest(TestCase):
+
+    def test_mixed_case_statuses_are_lowercased(self):
+        course = createCourse(capacity = None)
+        studentIds = createStudents(3, course.department)
+        for studentId, status in zip(studentIds, ['Ongoing', 'PASS', 'fail']):
+            enrollment.objects.create(student_id = studentId, course = course, status = status)
+
+        import_module('students.migrations.0016_lowercase_enrollment_status').lowercaseStatus(apps, None)
+
+        self.assertEqual(list(enrollment.objects.order_by('student_id').values_list('status', flat = True)), ['ongoing', 'pass', 'fail'])
+
+
+class StudentSearchTest(TestCase):
+
+    def setUp(self):
+        department = departments.objects.create(name = 'Computer Science')
+        self.studentIds = createStudents(3, department)
+        for studentId, (firstName, lastName) in zip(self.studentIds, [('Aarav', 'Mehta'), ('Aditi', 'Rao'), ('Kabir', 'Aggarwal')]):
+            User.objects.filter(students__id = studentId).update(first_name = firstName, last_name = lastName)
+        students.objects.filter(id = self.studentIds[0]).update(dob = yearsAgo(20))
+        students.objects.filter(id = self.studentIds[1]).update(dob = yearsAgo(25))
+        # the rows of the previous test are rolled back, the index of this process must not patch on from them
+        search._prefixIndex['version'] = None
+
+    def test_prefix_matches_first_last_and_full_name_and_email(self):
+        self.assertEqual(set(matchingStudentIds('a')), set(self.studentIds))
+        self.assertEqual(matchingStudentIds('ad'), [self.studentIds[1]])
+        self.assertEqual(matchingStudentIds('AARAV ME'), [self.studentIds[0]])
+        self.assertEqual(matchingStudentIds('student2@'), [self.studentIds[2]])
+        self.assertEqual(matchingStudentIds('  '), [])
+
+    def test_saved_and_deleted_students_are_patched_into_the_index(self):
+        self.assertEqual(matchingStudentIds('kabir'), [self.studentIds[2]])
+
+        with self.captureOnCommitCallbacks(execute = True):
+            user = User.objects.get(students__id = self.studentIds[2])
+            user.first_name = 'Zoya'
+            user.save()
+            students.objects.filter(id = self.studentIds[0]).delete()
+            user = User.objects.create(username = 'meera@example.com', email = 'meera@example.com', first_name = 'Meera')
+            newcomer = students.objects.create(student = user, contact = 9000000009, branch = departments.objects.get(), yos = 1, address = 'Patiala').id
+
+        with mock.patch('students.search.buildPrefixIndex', side_effect = AssertionError('rebuilt')):
+            self.assertEqual(matchingStudentIds('kabir'), [])
+            self.assertEqual(matchingStudentIds('zoya'), [self.studentIds[2]])
+            self.assertEqual(matchingStudentIds('aarav'), [])
+            self.assertEqual(matchingStudentIds('meera'), [newcomer])
+
+    def test_autocomplete_is_only_for_admins(self):
+        url = '/student/students_list/autocomplete/'
+        self.assertEqual(self.client.get(url, {'q': 'ad'}).status_code, 403)
+        self.client.force_login(User.objects.get(students__id = self.studentIds[0]))
+        self.assertEqual(self.client.get(url, {'q': 'ad'}).status_code, 403)
+
+        self.client.force_login(User.objects.create(username = 'admin', is_superuser = True))
+        self.assertEqual([result['id'] for result in self.client.get(url, {'q': 'ad'}).json()['results']], [self.studentIds[1]])
+
+    def test_age_filters_include_the_birthday_and_ignore_out_of_range_ages(self):
+        self.assertEqual(set(searchStudents(QueryDict('minAge=20&maxAge=24')).values_list('id', flat = True)), {self.studentIds[0]})
+        self.assertEqual(set(searchStudents(QueryDict('minAge=25')).values_list('id', flat = True)), {self.studentIds[1]})
+        # an age that can't be turned into a date is ignored instead of failing the search
+        self.assertEqual(searchStudents(QueryDict('minAge=3000&maxAge=-1')).count(), 3)
+        self.assertEqual(yearsAgo(0), date.today())
+
+
+class CatalogCacheTest(TestCase):
+
+    def setUp(self):
+        caches['catalog'].clear()
+
+    def test_pages_follow_course_and_department_edits(self):
+        course = createCourse(capacity = None)
+        self.assertIn('Operating Systems', catalogPage('', None)['html'])
+
+        with self.captureOnCommitCallbacks(execute = True):
+            course.name = 'Compilers'
+            course.save()
+        self.assertIn('Compilers', catalogPage('', None)['html'])
+
+        with self.captureOnCommitCallbacks(execute = True):
+            department = course.department
+            department.name = 'Information Technology'
+            department.save()
+        self.assertIn('Information Technology', catalogPage('', None)['html'])
+
+    def test_seat_changes_keep_the_version_and_show_the_current_counter(self):
+        course = createCourse(capacity = None)
+        studentId = createStudents(1, course.department)[0]
+        version = catalogPage('', None)['version']
+
+        with self.captureOnCommitCallbacks(execute = True):
+            enrollOrWaitlist(studentId, course.id)
+        page = catalogPage('', None)
+        self.assertEqual(page['version'], version)
+        self.assertEqual(page['seats'], {course.id: 1})
+        self.assertIn('<span class="value" style = "color:#5a5a5a;">1</span>', page['html'])
+
+
+class StudentProfileCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def assertNoStudentQueries(self, function):
+        with CaptureQueriesContext(connection) as queries:
+            result = function()
+        self.assertFalse([query for query in queries.captured_queries if 'students_students' in query['sql']])
+        return result
+
+    def test_cached_profile_follows_saves_and_renamed_departments(self):
+        department = departments.objects.create(name = 'Computer Science')
+        studentId = createStudents(1, department)[0]
+        user = User.objects.get(students__id = studentId)
+
+        self.assertEqual(getStudentProfile(user).yos, 1)
+        self.assertEqual(self.assertNoStudentQueries(lambda: getStudentProfile(user)).branch.name, 'Computer Science')
+
+        with self.captureOnCommitCallbacks(execute = True):
+            studentInstance = students.objects.get(id = studentId)
+            studentInstance.yos = 2
+            studentInstance.save()
+        self.assertEqual(getStudentProfile(user).yos, 2)
+
+        with self.captureOnCommitCallbacks(execute = True):
+            department.name = 'Computer Engineering'
+            department.save()
+        self.assertEqual(getStudentProfile(user).branch.name, 'Computer Engineering')
+
+    def test_users_without_a_profile_are_cached_until_they_complete_it(self):
+        department = departments.objects.create(name = 'Computer Science')
+        user = User.objects.create(username = 'new@example.com', email = 'new@example.com')
+        self.assertIsNone(getStudentProfile(user))
+        self.assertIsNone(self.assertNoStudentQueries(lambda: getStudentProfile(user)))
+
+        with self.captureOnCommitCallbacks(execute = True):
+            students.objects.create(student = user, contact = 9000000000, branch = department, yos = 1, address = 'Patiala')
+        self.assertEqual(getStudentProfile(user).yos, 1)
+
+
+def photoUpload(color, size=(800, 600)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG')
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type = 'image/jpeg')
+
+
+class StudentPhotoTest(TestCase):
+
+    def setUp(self):
+        mediaRoot = TemporaryDirectory()
+        self.addCleanup(mediaRoot.cleanup)
+        settingsOverride = override_settings(MEDIA_ROOT = mediaRoot.name)
+        settingsOverride.enable()
+        self.addCleanup(settingsOverride.disable)
+
+        department = departments.objects.create(name = 'Computer Science')
+        self.studentList = list(students.objects.filter(id__in = createStudents(2, department)).order_by('id'))
+
+    def test_same_content_is_stored_once_under_its_hash(self):
+        first, second = self.studentList
+        storePhoto(first, photoUpload('red'))
+        storePhoto(second, photoUpload('red'))
+
+        self.assertEqual(first.photo.name, second.photo.name)
+        self.assertRegex(first.photo.name, r'^photos/original/[0-9a-f]{20}\.jpg$')
+        self.assertEqual(default_storage.listdir('photos/original')[1], [first.photo.name.split('/')[-1]])
+        self.assertFalse(first.photo_thumbnails)
+
+    def test_thumbnails_are_square_and_reused_by_the_next_upload(self):
+        first, second = self.studentList
+        storePhoto(first, photoUpload('blue'))
+        generateThumbnails(first.photo.name)
+
+        for variant, size in PHOTO_VARIANTS.items():
+            with default_storage.open(thumbnailName(photoHash(first.photo.name), variant)) as thumbnail, Image.open(thumbnail) as image:
+                self.assertEqual(image.size, (size, size))
+
+        storePhoto(second, photoUpload('blue'))
+        self.assertTrue(second.photo_thumbnails)
+
+    def test_sweep_removes_only_photos_nobody_shows(self):
+        first, second = self.studentList
+        storePhoto(first, photoUpload('green'))
+        generateThumbnails(first.photo.name)
+        replaced = first.photo.name
+        storePhoto(first, photoUpload('white'))
+        storePhoto(second, photoUpload('white'))
+
+        # fresh uploads are kept until the grace period is over
+        self.assertEqual(deleteUnusedPhotos(), 0)
+        self.assertEqual(deleteUnusedPhotos(graceHours = -1), 1)
+        self.assertFalse(default_storage.exists(replaced))
+        self.assertFalse(default_storage.exists(thumbnailName(photoHash(replaced), 'card')))
+        self.assertTrue(default_storage.exists(first.photo.name))
+
+
+class SessionTest(TestCase):
+
+    def test_store_counts_each_read_and_write_once(self):
+        session = SessionStore()
+        session['theme'] = 'dark'
+        session.save()
+        # the new key is checked for a clash once and the session is written once even though save() goes through create()
+        self.assertEqual((session.reads, session.writes), (1, 1))
+
+        loaded = SessionStore(session.session_key)
+        self.assertEqual(loaded['theme'], 'dark')
+        loaded.delete()
+        self.assertEqual((loaded.reads, loaded.writes), (1, 1))
+
+    def test_expired_sessions_are_cleared_in_batches(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key = f'expired{i}', session_data = '', expire_date = now - timedelta(days = 1))
+        Session.objects.create(session_key = 'active', session_data = '', expire_date = now + timedelta(days = 1))
+
+        with self.assertNumQueries(7):
+            self.assertEqual(clearExpiredSessions(batchSize = 2), 5)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat = True)), ['active'])
+
+        with override_settings(SESSION_BACKEND = 'django.contrib.sessions.backends.cache'):
+            self.assertEqual(clearExpiredSessions(), 0)
+
+    @override_settings(SESSION_METRICS_HEADERS = True)
+    def test_middleware_reports_the_session_use_of_the_request(self):
+        response = self.client.get('/student/login/')
+        self.assertEqual((response['X-Session-Reads'], response['X-Session-Writes']), ('0', '0'))
+
+        self.client.force_login(User.objects.create(username = 'admin', is_superuser = True))
+        response = self.client.get('/student/home/')
+        self.assertEqual((response['X-Session-Reads'], response['X-Session-Writes']), ('1', '0'))
+
+        response = self.client.get('/student/logout/')
+        self.assertEqual((response['X-Session-Reads'], response['X-Session-Writes']), ('1', '1'))
+
+
+# the flush only writes outside of transactions, which a TestCase never is
+class SlowQueryLogTest(TransactionTestCase):
+
+    def setUp(self):
+        querylog._pending.clear()
+        querylog._explained.clear()
+
+    def test_fingerprint_ignores_in_list_lengths_and_whitespace(self):
+        key, normalized = fingerprint('SELECT id  FROM students\n WHERE id IN (%s, %s, %s)')
+        self.assertEqual(normalized, 'SELECT id FROM students WHERE id IN (...)')
+        self.assertEqual(fingerprint('SELECT id FROM students WHERE id IN (%s)')[0], key)
+        self.assertNotEqual(fingerprint('SELECT id FROM courses WHERE id IN (%s)')[0], key)
+
+    def test_only_queries_over_the_threshold_are_recorded(self):
+        with connection.execute_wrapper(SlowQueryLogger(thresholdMs = 60 * 1000)):
+            list(students.objects.all())
+        self.assertEqual(querylog._pending, {})
+
+        with self.assertLogs('students.slowqueries', 'WARNING'), connection.execute_wrapper(SlowQueryLogger(thresholdMs = 0)):
+            list(students.objects.all())
+            list(students.objects.all())
+        [stats] = querylog._pending.values()
+        self.assertEqual(stats['calls'], 2)
+        self.assertIn('students/tests.py', stats['caller'])
+        self.assertTrue(stats['explain'])
+
+    def test_flush_adds_to_the_rows_of_other_processes_and_waits_for_the_interval(self):
+        key, normalized = fingerprint('SELECT 1')
+        slowQueries.objects.create(fingerprint = key, sql = normalized, caller = 'other', calls = 3, total_ms = 900, max_ms = 400, last_seen = timezone.now())
+        querylog._pending[key] = {'sql': normalized, 'caller': 'students/views.py:1 in home', 'calls': 1, 'total_ms': 500, 'max_ms': 500, 'explain': 'plan'}
+
+        # the flush waits for the interval and never writes into a transaction that may still roll back
+        querylog._lastFlush[0] = time.monotonic()
+        maybeFlushSlowQueries()
+        querylog._lastFlush[0] -= settings.SLOW_QUERY_FLUSH_SECONDS
+        with transaction.atomic():
+            maybeFlushSlowQueries()
+        self.assertEqual(slowQueries.objects.get().calls, 3)
+
+        maybeFlushSlowQueries()
+        row = slowQueries.objects.get()
+        self.assertEqual((row.calls, row.total_ms, row.max_ms, row.explain), (4, 1400, 500, 'plan'))
+        self.assertEqual(querylog._pending, {})
+
+    def test_report_lists_the_slowest_fingerprints_and_resets(self):
+        for calls, sql in [(1, 'SELECT 1'), (5, 'SELECT 2')]:
+            slowQueries.objects.create(fingerprint = fingerprint(sql)[0], sql = sql, caller = 'students/views.py:1 in home', calls = calls,
+                                       total_ms = calls * 300, max_ms = 300, explain = 'SCAN students', last_seen = timezone.now())
+
+        out = StringIO()
+        call_command('slow_queries', '--limit', '1', '--explain', stdout = out)
+        self.assertIn('SELECT 2', out.getvalue())
+        self.assertNotIn('SELECT 1', out.getvalue())
+        self.assertIn('SCAN students', out.getvalue())
+
+        call_command('slow_queries', '--reset', stdout = StringIO())
+        self.assertFalse(slowQueries.objects.exists())
+
+
+# the poll loop reads through close_old_connections, which would end the transaction of a TestCase
+class LiveHubTest(TransactionTestCase):
+
+    def setUp(self):
+        self.course = createCourse(capacity = None)
+        self.studentId = createStudents(1, self.course.department)[0]
+        self.topic = studentTopic(self.studentId)
+
+    def test_every_subscriber_of_a_topic_gets_only_the_newest_state(self):
+        hub = LiveHub()
+        first, second = asyncio.Queue(maxsize = 1), asyncio.Queue(maxsize = 1)
+        hub.subscribers[self.topic] = {first, second}
+        hub.publish(self.topic, 'old')
+        hub.publish(self.topic, 'new')
+        self.assertEqual((first.get_nowait(), second.get_nowait()), ('new', 'new'))
+        self.assertEqual(hub.states[self.topic], 'new')
+
+    @override_settings(LIVE_POLL_SECONDS = 0.05)
+    def test_poll_loop_delivers_changes_and_stops_with_the_last_subscriber(self):
+        async def scenario():
+            hub = LiveHub()
+            first, second = hub.subscribe(self.topic), hub.subscribe(self.topic)
+            initial = await asyncio.wait_for(first.get(), 1)
+            self.assertEqual(await asyncio.wait_for(second.get(), 1), initial)
+            self.assertEqual(json.loads(initial)['activeCount'], 0)
+
+            # saved without a notify, the next round of the loop finds it
+            await sync_to_async(enrollment.objects.create)(student_id = self.studentId, course = self.course, status = 'ongoing')
+            changed = await asyncio.wait_for(first.get(), 1)
+            self.assertEqual(json.loads(changed)['activeCount'], 1)
+            self.assertEqual(await asyncio.wait_for(second.get(), 1), changed)
+
+            # a late subscriber starts from the state the others already have
+            third = hub.subscribe(self.topic)
+            self.assertEqual(third.get_nowait(), changed)
+
+            for queue in (first, second, third):
+                hub.unsubscribe(self.topic, queue)
+            self.assertEqual((hub.subscribers, hub.states, hub.signatures), ({}, {}, {}))
+            await asyncio.wait_for(hub.task, 1)
+
+        async_to_sync(scenario)()
+
+    @override_settings(LIVE_POLL_SECONDS = 60)
+    def test_notify_delivers_a_change_before_the_next_round(self):
+        async def scenario():
+            hub = LiveHub()
+            queue = hub.subscribe(self.topic)
+            await asyncio.wait_for(queue.get(), 1)
+
+            await sync_to_async(enrollment.objects.create)(student_id = self.studentId, course = self.course, status = 'ongoing')
+            hub.notify()
+            self.assertEqual(json.loads(await asyncio.wait_for(queue.get(), 1))['activeCount'], 1)
+
+            hub.unsubscribe(self.topic, queue)
+            hub.notify()
+            await asyncio.wait_for(hub.task, 1)
+
+        async_to_sync(scenario)()
+
+
+class FragmentPagingTest(TestCase):
+
+    def setUp(self):
+        caches['catalog'].clear()
+        self.client.force_login(User.objects.create(username = 'admin', is_superuser = True))
+
+    def pages(self, url):
+        responses = [self.client.get(url)]
+        while responses[-1]['X-Next-Cursor']:
+            responses.append(self.client.get(url, {'cursor': responses[-1]['X-Next-Cursor']}))
+        return responses
+
+    def test_student_cards_are_paged_by_cursor_until_the_last_batch(self):
+        course = createCourse(capacity = None)
+        createStudents(STUDENTS_BATCH_SIZE + 5, course.department)
+
+        first, last = self.pages('/student/students_list/fragment/')
+        self.assertEqual(first.content.decode().count('class="student-card"'), STUDENTS_BATCH_SIZE)
+        self.assertEqual(first['X-Total-Count'], str(STUDENTS_BATCH_SIZE + 5))
+        self.assertEqual(last.content.decode().count('class="student-card"'), 5)
+        self.assertEqual(last['X-Next-Cursor'], '')
+        self.assertNotIn('X-Total-Count', last)
+
+        emails = re.findall(r'student\d+@example\.com', first.content.decode() + last.content.decode())
+        self.assertEqual(len(set(emails)), STUDENTS_BATCH_SIZE + 5)
+
+    def test_course_cards_are_paged_by_cursor_until_the_last_batch(self):
+        course = createCourse(capacity = None)
+        for i in range(COURSES_BATCH_SIZE):
+            courses.objects.create(name = f'Elective {i}', department = course.department, HOD = course.HOD, enrolled_students = 0)
+
+        first, last = self.pages('/student/courses/fragment/')
+        self.assertEqual(first.content.decode().count('class="course-card"'), COURSES_BATCH_SIZE)
+        self.assertEqual(last.content.decode().count('class="course-card"'), 1)
+        self.assertEqual(last['X-Next-Cursor'], '')
+
+        # courses that fill the batches exactly end on the first one instead of sending an empty last batch
+        with self.captureOnCommitCallbacks(execute = True):
+            courses.objects.get(id = course.id).delete()
+        self.assertEqual(len(self.pages('/student/courses/fragment/')), 1)
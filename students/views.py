@@ -1,16 +1,56 @@
 from django.shortcuts import render, redirect
+from django.conf import settings
+from django.http import JsonResponse, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login as auth_login, update_session_auth_hash, logout as auth_logout
 from django.contrib import messages
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.urls import reverse
-from django.db.models import Q
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
-
-from students.models import students, courses, enrollment 
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import condition
+from django.views.decorators.cache import cache_control
+from asgiref.sync import sync_to_async
+
+from students.models import students, courses, enrollment, departments, hods, studentsArchive, auditLog
+from students.profiles import getStudentProfile
+from students.search import searchStudents, matchingStudentIds
+from students.pagination import cursorBatch
+from students.archive import restoreStudent
+from students.enrollments import enrollOrWaitlist, bulkChangeStatus
+from students.eligibility import eligibleCourses
+from students.photos import storePhoto, validatePhoto, photoUrl
+from students.dashboard import adminDashboardStats
+from students.audit import recordChange, changedFields
+from students.live import eventStream, DASHBOARD_TOPIC, studentTopic
+from students.changefeed import changesSince, ResyncRequired, CHANGE_FEED_BATCH_SIZE
+from students.conditional import profileEtag, myCoursesEtag, myCoursesLastModified, catalogEtag, requestCatalogPage
 
 from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime
+from functools import wraps
+
+STUDENTS_BATCH_SIZE = 20
+
+
+def superuserRequired(view):
+    """Answers everyone but the admins with 403, for the views that show or change the data of every student
+
+    Args:
+        view (function): view to guard
+
+    Returns:
+        function: the guarded view
+    """
+    @wraps(view)
+    def guardedView(request, *args, **kwargs):
+        if not request.user.is_superuser:
+            return HttpResponseForbidden()
+        return view(request, *args, **kwargs)
+    return guardedView
 
 # ------------------------------View function related to Registeration and Login functionality-----------------------------------------------------------------------------------------------------------
 
@@ -54,7 +94,7 @@ def login(request):
             user = authenticate(username = email, password = password)
             if user:
                 auth_login(request, user) 
-                studentInstance = students.objects.filter(student_id = user.id).first()
+                studentInstance = getStudentProfile(user)
                 if user.is_superuser or studentInstance:
                     return redirect('home')
                 else:
@@ -88,42 +128,38 @@ def completeProfilePage(request):
          HttpResponse: renders the HTML response and if user is already registered then redirects the user to home page
     """
     user = request.user
+    if request.student:
+        return redirect('home')
+    
     context = {
         'firstName':user.first_name,
         'lastName':user.last_name, 
         'email':user.email,
+        'departments':departments.objects.order_by('name'),
     }
     
     if request.method == 'POST':
         studentData = request.POST
-        students.objects.create(
-            fatherName = studentData.get('fatherName'), 
-            motherName = studentData.get('motherName'),
-            contact = studentData.get('contact'),
-            dob = studentData.get('dob'),
-            branch = studentData.get('branch'),
-            yos = studentData.get('year'),
-            address = studentData.get('address'),
-            semester = studentData.get('semester'), 
-            student_id = user.id
-            )
+        # the change log entry of the new student commits together with the row
+        with transaction.atomic():
+            student = students.objects.create(
+                fatherName = studentData.get('fatherName'), 
+                motherName = studentData.get('motherName'),
+                contact = studentData.get('contact'),
+                dob = studentData.get('dob'),
+                branch_id = studentData.get('branch'),
+                yos = studentData.get('year'),
+                address = studentData.get('address'),
+                semester = studentData.get('semester'), 
+                student_id = user.id
+                )
         
-        student = students.objects.get(student_id = user.id)
+        # courses of the branch, year and semester whose prerequisites the student passed
+        eligibleIds = eligibleCourses(students.objects.filter(id = student.id))[student.id]
         
-        branch = student.branch
-        yos = student.yos
-        semester = student.semester
-        
-        courseqs = courses.objects.filter(department = branch, year = yos, semester = semester)
-        
-        for course in courseqs:
-            enrollment.objects.create(
-                course_id = course.id,
-                student_id = student.id,
-                status = 'Ongoing'
-            )
-            course.enrolled_students  += 1
-            course.save()
+        # every seat is taken in its own short transaction so that a burst of registrations doesn't hold locks on all the courses of a semester
+        for courseId in sorted(eligibleIds):
+            enrollOrWaitlist(student.id, courseId)
         
         return redirect('home')
     
@@ -235,20 +271,13 @@ def home(request):
     todayDate = datetime.now().strftime("%Y-%m-%d")
     
     if user.is_superuser:
-        courseCount = len(courses.objects.all().values_list('id', flat=True))
-        hodCount = len(courses.objects.values_list('HOD', flat=True).distinct())
-        studentCount = len(students.objects.all().values_list('id', flat=True))
-        deptCount = len(courses.objects.values_list('department', flat=True).distinct())
-        
-        context = {
-            'courseCount':courseCount,
-            'hodCount':hodCount,
-            'studentCount':studentCount,
-            'deptCount':deptCount,
-        }
+        context = dict(adminDashboardStats())
         
     else:
-        studentInstance = students.objects.filter(student_id = user.id).first()
+        studentInstance = request.student
+        if not studentInstance:
+            return redirect('complete profile')
+        
         branch = studentInstance.branch
         year = studentInstance.yos
         semester = studentInstance.semester
@@ -271,6 +300,41 @@ def home(request):
     return render(request, "home.html", context)
 
 
+async def liveUpdates(request):
+    """Server-sent event stream behind the home and my courses pages, admins get the dashboard counters and students the status of their courses,
+    the first event carries the current state and a new one follows every change
+
+    Args:
+        request (HttpRequest): incoming HTTP request from the client
+
+    Returns:
+        StreamingHttpResponse: endless text/event-stream response, 204 when there is nothing to stream so EventSource stops reconnecting
+    """
+    # under WSGI every open stream would hold a worker thread for as long as the page stays open
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status = 204)
+    
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status = 204)
+    
+    if user.is_superuser:
+        topic = DASHBOARD_TOPIC
+    else:
+        studentInstance = await sync_to_async(getStudentProfile)(user)
+        if not studentInstance:
+            return HttpResponse(status = 204)
+        topic = studentTopic(studentInstance.id)
+    
+    response = StreamingHttpResponse(eventStream(topic), content_type = 'text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx buffers proxied responses by default, which would hold the events back
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=profileEtag)
 def studentDetails(request):
     """Shows all the Profile details of the student as well as the admin depending upon the user 
 
@@ -282,7 +346,10 @@ def studentDetails(request):
     """
     user = request.user
     if not user.is_superuser:
-        studentInstance = students.objects.get(student = user.id)
+        studentInstance = request.student
+        if not studentInstance:
+            return redirect('complete profile')
+        
         context = {
             'studentData': {
             'firstName': user.first_name,
@@ -322,7 +389,10 @@ def editStudentDetails(request):
         HttpResponse: Renders the HTML response initially then after saving the changes redirects the student to Profile page where details are visible 
     """
     user = request.user
-    studentInstance = students.objects.get(student = user.id)
+    studentInstance = request.student
+    if not studentInstance:
+        return redirect('complete profile')
+    
     context = {
         'studentData': {
         'firstName': user.first_name,
@@ -341,6 +411,14 @@ def editStudentDetails(request):
     
     if request.method == 'POST':
         inputData = request.POST
+        photo = request.FILES.get('photo')
+        if photo:
+            try:
+                validatePhoto(photo)
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
+                return redirect("edit details")
+        
         user.first_name = inputData.get('firstName')
         user.last_name = inputData.get('lastName')
         user.email = inputData.get('email')
@@ -349,12 +427,18 @@ def editStudentDetails(request):
         studentInstance.contact = inputData.get('contact')
         studentInstance.address = inputData.get('address')
         
-        user.save()
-        studentInstance.save()
+        with transaction.atomic():
+            user.save()
+            studentInstance.save()
+            if photo:
+                # the thumbnails are made in the background, the placeholder is shown until they are ready
+                storePhoto(studentInstance, photo)
         messages.success(request, "Changes made successfully")
         return redirect("student profile")
     return render(request, "editProfile.html", context)
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=myCoursesEtag, last_modified_func=myCoursesLastModified)
 def studentCourses(request):
     """Shows the students list of their courses and provides a filter option to see the courses with status like ongoing, pass or fail
 
@@ -366,25 +450,25 @@ def studentCourses(request):
     """
     user = request.user
     
-    studentInstance = students.objects.get(student_id = user.id)
+    studentInstance = request.student
+    if not studentInstance:
+        return redirect('complete profile')
+    
     filterData = request.GET.get('filter', "All")
     
+    enrollmentQs = enrollment.objects.filter(student_id = studentInstance.id)
     if filterData != 'All':
-        courseIdList = enrollment.objects.filter(student_id = studentInstance.id, status = filterData).values_list('course_id', flat=True)
-    
-    else:
-        courseIdList = enrollment.objects.filter(student_id = studentInstance.id).values_list('course_id', flat=True)
+        enrollmentQs = enrollmentQs.filter(status = filterData)
             
     courseData = []
     
-    for id in courseIdList:
-        enrollmentInstance = enrollment.objects.get(course_id = id, student_id = studentInstance.id)
-        courseInstance = courses.objects.get(id = id)
+    for courseId, name, department, HOD, status in enrollmentQs.values_list('course_id', 'course__name', 'course__department__name', 'course__HOD__name', 'status'):
         courseDict = {
-            'name': courseInstance.name,
-            'department': courseInstance.department,
-            'HOD': courseInstance.HOD, 
-            'status':enrollmentInstance.status.upper()
+            'id': courseId,
+            'name': name,
+            'department': department,
+            'HOD': HOD, 
+            'status':status.upper()
         }
         courseData.append(courseDict)
         
@@ -398,21 +482,12 @@ def studentCourses(request):
 
 #------------------------------View functions based on Admin's interaction---------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
-def studentsList(request):
-    """Shows the list of students 
-
-    Args:
-        request (HttpRequest): incoming HTTP request from the client
-
-    Returns:
-        HttpResponse: Renders the HTML response
-    """
-    studentsQs = students.objects.select_related('student').all().values_list('id','branch', 'yos','student__first_name', 'student__last_name', 'student__email', 'semester')
+def studentsBatch(request):
+    studentsQs = searchStudents(request.GET).values_list('id','branch__name', 'yos','student__first_name', 'student__last_name', 'student__email', 'semester', 'photo', 'photo_thumbnails')
+    studentRows, nextCursor = cursorBatch(studentsQs, request.GET.get('cursor'), STUDENTS_BATCH_SIZE)
     
     studentsData = []
-    count = 0
-    for std in studentsQs:
-        count += 1
+    for std in studentRows:
         userDict = {
             'id': std[0],
             'firstName': std[3],
@@ -421,15 +496,87 @@ def studentsList(request):
             'branch': std[1],
             'yos': std[2],
             'semester':std[6],
+            'photo': photoUrl(std[7], std[8], 'list'),
         }
         studentsData.append(userDict)
+    
+    return studentsData, nextCursor
+
+def studentsList(request):
+    """Shows the first batch of students, optionally filtered by name or email prefix, branch, year, semester, age range and contact,
+    the next batches are loaded on scroll through the students list fragment
+
+    Args:
+        request (HttpRequest): incoming HTTP request from the client
+
+    Returns:
+        HttpResponse: Renders the HTML response
+    """
+    studentsData, nextCursor = studentsBatch(request)
         
     context = {
         'studentsData': studentsData,
-        'count': count
+        'nextCursor': nextCursor,
+        'count': searchStudents(request.GET).count(),
+        'departments': departments.objects.order_by('name'),
     }
     return render(request, "studentsList.html", context)
 
+def studentsListFragment(request):
+    """Renders only the student cards of the next batch after the cursor, used by the infinite scroll and the search of the students list
+
+    Args:
+        request (HttpRequest): incoming HTTP request from the client
+
+    Returns:
+        HttpResponse: Renders the student cards with the next cursor in the X-Next-Cursor header and, for the first batch, the total in X-Total-Count
+    """
+    studentsData, nextCursor = studentsBatch(request)
+    
+    response = render(request, "partials/studentCards.html", {'studentsData': studentsData})
+    response['X-Next-Cursor'] = nextCursor or ''
+    if not request.GET.get('cursor'):
+        response['X-Total-Count'] = searchStudents(request.GET).count()
+    return response
+
+@superuserRequired
+def studentAutocomplete(request):
+    """Suggests students whose name or email starts with the typed text, the lookup runs on the in process prefix index and a primary key query
+
+    Args:
+        request (HttpRequest): incoming HTTP request from the client with the typed text in q
+
+    Returns:
+        JsonResponse: list of at most 10 matching students with their id, name and email
+    """
+    studentIds = matchingStudentIds(request.GET.get('q', ''), limit=10)
+    studentsQs = students.objects.filter(id__in = studentIds).values_list('id', 'student__first_name', 'student__last_name', 'student__email')
+    
+    studentsById = {std[0]: std for std in studentsQs}
+    results = []
+    for studentId in studentIds:
+        if studentId in studentsById:
+            _, firstName, lastName, email = studentsById[studentId]
+            results.append({'id': studentId, 'name': f'{firstName} {lastName}', 'email': email})
+    
+    return JsonResponse({'results': results})
+
+def auditedStudentFields(userInstance, studentInstance):
+    return {
+        'first_name': userInstance.first_name,
+        'last_name': userInstance.last_name,
+        'email': userInstance.email,
+        'is_active': userInstance.is_active,
+        'fatherName': studentInstance.fatherName,
+        'motherName': studentInstance.motherName,
+        'contact': studentInstance.contact,
+        'address': studentInstance.address,
+        'dob': studentInstance.dob,
+        'yos': studentInstance.yos,
+        'branch': studentInstance.branch_id,
+        'semester': studentInstance.semester,
+    }
+
 def editStudentProfile(request, id):
     """Provides the functionality to admin to change the profile details of any student 
 
@@ -444,6 +591,7 @@ def editStudentProfile(request, id):
     userInstance = User.objects.get(id = studentInstance.student_id)
 
     data = {
+        'id': studentInstance.id,
         'firstName':userInstance.first_name,
         'lastName':userInstance.last_name,
         'email':userInstance.email,
@@ -453,17 +601,20 @@ def editStudentProfile(request, id):
         'contact': studentInstance.contact,
         'dob': studentInstance.dob,
         'address': studentInstance.address,
-        'branch': studentInstance.branch,
+        'branch': studentInstance.branch_id,
         'yos': studentInstance.yos,
         'semester':studentInstance.semester,
+        'departments':departments.objects.order_by('name'),
     }
     
     if request.method == "POST":
         if request.POST.get('action') == 'delete':
+            recordChange(request.user, 'student.delete', studentId = studentInstance.id, changes = {'email': {'from': userInstance.email, 'to': None}})
             userInstance.delete()
             studentInstance.delete()
             
         else:
+            before = auditedStudentFields(userInstance, studentInstance)
             inputData = request.POST
             userInstance.first_name = inputData.get('firstName')
             userInstance.last_name = inputData.get('lastName')
@@ -473,42 +624,69 @@ def editStudentProfile(request, id):
             studentInstance.motherName = inputData.get('lastName')
             studentInstance.contact = inputData.get('contact')
             studentInstance.address = inputData.get('address')
-            studentInstance.dob = inputData.get('dob')
+            studentInstance.dob = inputData.get('dob') or None
             studentInstance.yos = inputData.get('yos')
-            studentInstance.branch = inputData.get('branch')
+            studentInstance.branch_id = inputData.get('branch')
             studentInstance.semester = inputData.get('semester')
         
-            userInstance.save()
-            studentInstance.save()
+            with transaction.atomic():
+                userInstance.save()
+                studentInstance.save()
+            
+            changes = changedFields(before, auditedStudentFields(userInstance, studentInstance))
+            if changes:
+                recordChange(request.user, 'student.update', studentId = studentInstance.id, changes = changes)
         return redirect("students list")
     
     return render(request, "editStudentProfile.html", data)
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=catalogEtag)
 def courseList(request):
-    """Shows the List of all the courses 
+    """Shows the first batch of courses, the next batches are loaded on scroll through the course list fragment
 
     Args:
         request (HttpRequest): incoming HTTP request from the client
 
     Returns:
-        HttpResponse: Renders the HTML response and after editing redirectes to students list url
+        HttpResponse: Renders the HTML response
     """
-    courseQs = courses.objects.all()
-    
-    if request.method == "GET":
-        search = request.GET.get('search')
-        if search:
-            courseQs = courses.objects.filter(Q(name__icontains = search) | Q(HOD__icontains = search) | Q(department__icontains = search))
-            
-    pageInstance = Paginator(courseQs, 10)
-    pageNum = request.GET.get('page', 1)
+    page = requestCatalogPage(request)
     
     context = {
-        'courseQs':pageInstance.get_page(pageNum)
+        'courseCards':page['html'],
+        'nextCursor':page['nextCursor'],
     }
             
     return render(request, "courseList.html", context)
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=catalogEtag)
+def courseListFragment(request):
+    """Renders only the course cards of the next batch after the cursor, used by the infinite scroll and the search of the course list
+
+    Args:
+        request (HttpRequest): incoming HTTP request from the client
+
+    Returns:
+        HttpResponse: Renders the course cards with the next cursor in the X-Next-Cursor header
+    """
+    page = requestCatalogPage(request)
+    
+    response = HttpResponse(page['html'])
+    response['X-Next-Cursor'] = page['nextCursor'] or ''
+    return response
+
+def auditedCourseFields(course):
+    return {
+        'name': course.name,
+        'department': course.department_id,
+        'HOD': course.HOD_id,
+        'capacity': course.capacity,
+        'year': course.year,
+        'semester': course.semester,
+    }
+
 def editCourses(request, id):
     """Provides the functionality to edit the course details or removing a course from the Database
 
@@ -522,26 +700,38 @@ def editCourses(request, id):
     course = courses.objects.get(id = id)
     
     context = {
+        'id': course.id,
         'name': course.name,
-        'dept': course.department,
-        'HOD': course.HOD,
+        'dept': course.department_id,
+        'HOD': course.HOD_id,
+        'departments': departments.objects.order_by('name'),
+        'hods': hods.objects.order_by('name'),
         'enrolled': course.enrolled_students,
+        'capacity': course.capacity,
         'year': course.year,
         'semester':course.semester,
     }
     
     if request.method == 'POST':
         if request.POST.get('action') == 'delete':
+            recordChange(request.user, 'course.delete', courseId = course.id, changes = {'name': {'from': course.name, 'to': None}})
             course.delete()
         else:
+            before = auditedCourseFields(course)
             data = request.POST
             course.name = data.get('name')
-            course.department = data.get('dept')
-            course.HOD = data.get('HOD')
-            course.enrolled_students = data.get('enrolled')
+            course.department_id = data.get('dept')
+            course.HOD_id = data.get('HOD')
+            course.capacity = data.get('capacity') or None
             course.year = data.get('year')
             course.semester = data.get('semester')
-            course.save()
+            # enrolled_students is only shown on the form, it is maintained by the enrollments themselves and must not be overwritten with a stale value
+            with transaction.atomic():
+                course.save(update_fields=['name', 'department', 'HOD', 'capacity', 'year', 'semester', 'updated_at'])
+            
+            changes = changedFields(before, auditedCourseFields(course))
+            if changes:
+                recordChange(request.user, 'course.update', courseId = course.id, changes = changes)
         
         return redirect('courses')
         
@@ -562,6 +752,7 @@ def editStudentCourses(request, id):
         updatedData = request.POST
         
         ifInvalid = False
+        courseIdsByStatus = {}
         
         for key, value in updatedData.items():
 
@@ -569,56 +760,45 @@ def editStudentCourses(request, id):
                 pass
             else:
                 _, courseid = map(str, key.split("_"))
-                courseid = int(courseid)
-                
-                courseInstance = courses.objects.get(id = courseid)
-                enrollmentInstance = enrollment.objects.get(course_id = courseid, student_id = id)
-                
-                oldStatus = enrollmentInstance.status
                 value = value.strip().lower()
                 
-                if value != oldStatus:
-                    if value == "ongoing":
-                        courseInstance.enrolled_students += 1
-                        enrollmentInstance.status = value
-                
-                    elif value == "pass":
-                        courseInstance.enrolled_students -= 1
-                        enrollmentInstance.status = value
-                
-                    elif value == "fail":
-                        courseInstance.enrolled_students -= 1
-                        enrollmentInstance.status = value
+                if value not in ('ongoing', 'pass', 'fail'):
+                    ifInvalid = True
+                    storage = messages.get_messages(request)
+                    storage.used = True
                     
-                    else:
-                        ifInvalid = True
-                        storage = messages.get_messages(request)
-                        storage.used = True
-                        
-                        messages.error(request, "Please Provide a valid value for the status")
-                        break
-                    
-                courseInstance.save()
-                enrollmentInstance.save()
+                    messages.error(request, "Please Provide a valid value for the status")
+                    break
+                
+                courseIdsByStatus.setdefault(value, []).append(int(courseid))
         
         if not ifInvalid:
+            # the old statuses are read in one query so only real changes end up in the audit trail
+            submittedIds = [courseId for courseIds in courseIdsByStatus.values() for courseId in courseIds]
+            oldStatuses = dict(enrollment.objects.filter(student_id = id, course_id__in = submittedIds).values_list('course_id', 'status'))
+            
+            # one UPDATE per status, the course counters and the waitlists follow the change
+            for status, courseIds in courseIdsByStatus.items():
+                bulkChangeStatus(enrollment.objects.filter(student_id = id, course_id__in = courseIds), status)
+                for courseId in courseIds:
+                    if courseId in oldStatuses and oldStatuses[courseId] != status:
+                        recordChange(request.user, 'enrollment.status', studentId = id, courseId = courseId, changes = {'status': {'from': oldStatuses[courseId], 'to': status}})
+            
             storage = messages.get_messages(request)
             storage.used = True
             messages.success(request, "Successfully Updated")   
     
-    courseIdList = enrollment.objects.filter(student_id = id).values_list('course_id', flat=True)
+    enrollmentQs = enrollment.objects.filter(student_id = id).values_list('course_id', 'course__name', 'course__department__name', 'course__HOD__name', 'status')
     
     courseData = []
     
-    for courseId in courseIdList:
-        enrollmentInstance = enrollment.objects.get(course_id = courseId, student_id = id)
-        courseInstance = courses.objects.get(id = courseId)
+    for courseId, name, department, HOD, status in enrollmentQs:
         courseDict = {
             'id':courseId,
-            'name': courseInstance.name,
-            'department': courseInstance.department,
-            'HOD': courseInstance.HOD, 
-            'status':enrollmentInstance.status
+            'name': name,
+            'department': department,
+            'HOD': HOD, 
+            'status':status
         }
         courseData.append(courseDict)
         
@@ -626,4 +806,118 @@ def editStudentCourses(request, id):
         'courseData':courseData
     }
     
-    return render(request, "editStudentCourse.html", context)
\ No newline at end of file
+    return render(request, "editStudentCourse.html", context)
+
+@superuserRequired
+def archiveList(request):
+    """Shows the read only list of archived students, newest first
+
+    Args:
+        request (HttpRequest): incoming HTTP request from the client
+
+    Returns:
+        HttpResponse: Renders the HTML response
+    """
+    archivedQs = studentsArchive.objects.select_related('student', 'branch').order_by('-archived_at', '-id')
+    
+    pageInstance = Paginator(archivedQs, 20)
+    pageNum = request.GET.get('page', 1)
+    
+    context = {
+        'archivedQs': pageInstance.get_page(pageNum)
+    }
+    
+    return render(request, "archiveList.html", context)
+
+@superuserRequired
+def archivedStudentDetails(request, id):
+    """Shows the archived profile and course history of a graduated student and lets the admin restore the student into the working tables
+
+    Args:
+        request (HttpRequest): incoming HTTP request from the client
+        id (int): id of the archived student
+
+    Returns:
+        HttpResponse: Renders the HTML response and after restoring redirects to the students list url
+    """
+    archived = studentsArchive.objects.select_related('student', 'branch').get(id = id)
+    
+    if request.method == 'POST' and request.POST.get('action') == 'restore':
+        restoreStudent(archived.id)
+        messages.success(request, "Student restored successfully")
+        return redirect('students list')
+    
+    context = {
+        'archived': archived,
+        'enrollmentData': archived.enrollmentarchive_set.order_by('enrollment_date'),
+    }
+    
+    return render(request, "archivedStudent.html", context)
+
+def auditTrail(request, title, auditQs):
+    # the student and course filters lead the (student_id, created_at) and (course_id, created_at) indexes, so the newest page is read straight off the index
+    pageInstance = Paginator(auditQs.select_related('actor').order_by('-created_at', '-id'), 25)
+    pageNum = request.GET.get('page', 1)
+    
+    context = {
+        'title': title,
+        'auditQs': pageInstance.get_page(pageNum)
+    }
+    
+    return render(request, "auditLog.html", context)
+
+@superuserRequired
+def studentHistory(request, id):
+    """Shows the audit trail of a student, newest first, the trail is kept after the student is deleted
+
+    Args:
+        request (HttpRequest): incoming HTTP request from the client
+        id (int): student id
+
+    Returns:
+        HttpResponse: Renders the HTML response
+    """
+    return auditTrail(request, f"Student #{id}", auditLog.objects.filter(student_id = id))
+
+@superuserRequired
+def courseHistory(request, id):
+    """Shows the audit trail of a course, newest first, the trail is kept after the course is deleted
+
+    Args:
+        request (HttpRequest): incoming HTTP request from the client
+        id (int): course id
+
+    Returns:
+        HttpResponse: Renders the HTML response
+    """
+    return auditTrail(request, f"Course #{id}", auditLog.objects.filter(course_id = id))
+
+# ------------------------------View function related to the change feed of downstream systems-----------------------------------------------------------------------------------------------------------
+
+def changeFeedAllowed(request):
+    # the timetable and library systems send the shared token, admins can read the feed from their session
+    token = settings.CHANGE_FEED_TOKEN
+    if token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    return request.user.is_authenticated and request.user.is_superuser
+
+def changeFeed(request):
+    """Returns the changes of students, courses and enrollments after a sequence number, so downstream systems sync the deltas instead of the full tables
+
+    Args:
+        request (HttpRequest): incoming HTTP request from the client with the cursor of the last batch in since and the batch size in limit
+
+    Returns:
+        JsonResponse: changed rows with their current columns and the sequence number to pass next, 410 when the sync starts from a cursor
+        whose deletions were already purged and has to start again from 0
+    """
+    if not changeFeedAllowed(request):
+        return JsonResponse({'error': 'forbidden'}, status = 403)
+    
+    try:
+        page = changesSince(request.GET.get('since', 0), int(request.GET.get('limit', CHANGE_FEED_BATCH_SIZE)))
+    except ResyncRequired:
+        return JsonResponse({'error': 'resync', 'since': 0}, status = 410)
+    except ValueError:
+        return JsonResponse({'error': 'since must be a cursor returned by the feed and limit a number'}, status = 400)
+    return JsonResponse(page)
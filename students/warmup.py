@@ -0,0 +1,108 @@
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.template.loader import get_template
+from django.urls import resolve, reverse
+from django.urls.converters import IntConverter
+
+logger = logging.getLogger('students.warmup')
+
+
+def templateNames():
+    """Lists every template the Django template engine can load, relative to its template directory
+
+    Returns:
+        list: template names like home.html or partials/courseCards.html
+    """
+    names = set()
+    for loader in engines['django'].engine.template_loaders:
+        # the cached loader wraps the loaders that actually know the directories
+        for innerLoader in getattr(loader, 'loaders', [loader]):
+            for directory in innerLoader.get_dirs():
+                for root, _, files in os.walk(directory):
+                    for fileName in files:
+                        if fileName.endswith('.html'):
+                            names.add(os.path.relpath(os.path.join(root, fileName), directory).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def compileTemplates():
+    names = templateNames()
+    for name in names:
+        get_template(name)
+    return f"{len(names)} templates"
+
+
+def resolveUrls():
+    from students import urls
+
+    resolved = 0
+    for pattern in urls.urlpatterns:
+        if not pattern.name:
+            continue
+        kwargs = {
+            argument: 1 if isinstance(converter, IntConverter) else 'warmup'
+            for argument, converter in pattern.pattern.converters.items()
+        }
+        resolve(reverse(pattern.name, kwargs = kwargs))
+        resolved += 1
+    return f"{resolved} urls"
+
+
+def openConnections():
+    for alias in connections:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+    return f"{len(connections.all())} connections"
+
+
+def prefillCaches():
+    from students.catalog import catalogPage
+    from students.dashboard import adminDashboardStats
+
+    adminDashboardStats()
+    # the first batch of the course list is what every admin sees first
+    catalogPage('', None)
+    return "dashboard and course list"
+
+
+WARMUP_PHASES = [
+    ('templates', compileTemplates),
+    ('urls', resolveUrls),
+    ('database', openConnections),
+    ('caches', prefillCaches),
+]
+
+
+def warmUp():
+    """Pays the cold start costs of a fresh worker before the first user does: template compilation, URL resolver setup,
+    the first database connection and the dashboard and course list caches. Call it inside the worker, from the post fork hook of the server
+
+    Returns:
+        list: name, duration in seconds and a short summary of every phase
+    """
+    timings = []
+    for phase, run in WARMUP_PHASES:
+        start = time.perf_counter()
+        summary = run()
+        duration = time.perf_counter() - start
+        timings.append((phase, duration, summary))
+        logger.info("Warm up %s took %.1f ms (%s)", phase, duration * 1000, summary)
+    return timings
+
+
+def warmUpOnBoot():
+    """Warms the process that loads the WSGI or ASGI application when WARMUP_ON_BOOT is set. A server that loads the application in its master
+    and forks the workers afterwards (gunicorn --preload) warms the master only, its post_fork or post_worker_init hook has to call warmUp() instead
+    """
+    if not settings.WARMUP_ON_BOOT:
+        return
+    warmUp()
+    # the connections are only closed when this process actually forks, the forked workers must not share them, a worker that warmed itself keeps them;
+    # windows never forks
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(before = connections.close_all)